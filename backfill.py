@@ -0,0 +1,192 @@
+import argparse
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple, Iterator, Union
+from cnn_lite_parser import extract_saved_article
+from near_duplicates import simhash
+from news_storage import NewsStorage, compress_content
+
+PAGE_EXTENSIONS = (".html", ".htm")
+
+# A parsed page as it travels back from a worker: title, url, time as an ISO string,
+# compressed content and content fingerprint
+CompactArticle = Tuple[str, str, Optional[str], Union[str, bytes, None], Optional[int]]
+
+# A unit of work for one worker: page files in a directory, members of a zip archive
+# opened by the worker itself, or pages already read from a tar archive
+Chunk = Tuple[str, Any]
+
+def parse_page(page: bytes, name: str) -> Optional[CompactArticle]:
+    """Parse one saved page into its compact form, or None if it has no content."""
+    article = extract_saved_article(page, url=name)
+    if not article["content"]:
+        return None
+    article_time = article["time"]
+    if hasattr(article_time, "isoformat"):
+        article_time = article_time.isoformat()
+    return (
+        article["title"], article["url"], article_time,
+        compress_content(article["content"]), simhash(article["content"])
+    )
+
+def parse_chunk(chunk: Chunk) -> Tuple[List[CompactArticle], int]:
+    """Parse every page of a chunk in a worker process.
+
+    Content is compressed and fingerprinted here, so the main process only writes.
+
+    Returns:
+        Tuple of (parsed articles, number of pages that failed or had no content)
+    """
+    kind, payload = chunk
+    if kind == "files":
+        pages = ((path, _read_file(path)) for path in payload)
+    elif kind == "zip":
+        archive_path, names = payload
+        with zipfile.ZipFile(archive_path) as archive:
+            pages = [(name, archive.read(name)) for name in names]
+    else:
+        pages = iter(payload)
+
+    articles = []
+    failed = 0
+    for name, page in pages:
+        try:
+            article = parse_page(page, name)
+        except Exception as e:
+            print(f"Error parsing {name}: {e}")
+            article = None
+        if article is None:
+            failed += 1
+        else:
+            articles.append(article)
+    return articles, failed
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def _is_page(name: str) -> bool:
+    return name.lower().endswith(PAGE_EXTENSIONS)
+
+def iter_chunks(source: str, chunk_size: int) -> Iterator[Chunk]:
+    """Split the saved pages of a directory, zip archive or tar archive into chunks for the workers."""
+    def batched(items: Iterator[Any], kind: str, wrap=lambda batch: batch) -> Iterator[Chunk]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= chunk_size:
+                yield kind, wrap(batch)
+                batch = []
+        if batch:
+            yield kind, wrap(batch)
+
+    if os.path.isdir(source):
+        paths = (
+            os.path.join(root, name)
+            for root, dirs, names in os.walk(source)
+            for name in sorted(names) if _is_page(name)
+        )
+        yield from batched(paths, "files")
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [info.filename for info in archive.infolist() if not info.is_dir() and _is_page(info.filename)]
+        yield from batched(iter(names), "zip", lambda batch: (source, batch))
+    elif tarfile.is_tarfile(source):
+        # Tar archives can only be read in order, so pages are read here and sent to the workers
+        with tarfile.open(source, "r:*") as archive:
+            pages = (
+                (member.name, archive.extractfile(member).read())
+                for member in archive if member.isfile() and _is_page(member.name)
+            )
+            yield from batched(pages, "pages")
+    else:
+        raise ValueError(f"{source} is not a directory, zip archive or tar archive")
+
+def backfill(source: str, storage: NewsStorage, workers: Optional[int] = None,
+             chunk_size: int = 64, batch_size: int = 1000) -> Dict[str, Any]:
+    """Parse saved pages across all cores and write them to the database in batches.
+
+    Pages are parsed, compressed and fingerprinted in a process pool. The main process
+    keeps a bounded number of chunks in flight and upserts the results by URL, so a
+    backfill can be run again over the same pages.
+
+    Args:
+        source: Directory, zip archive or tar archive of saved CNN Lite article pages
+        storage: NewsStorage to write to
+        workers: Number of worker processes. If None, one per CPU.
+        chunk_size: Pages parsed per task sent to a worker
+        batch_size: Articles written per transaction
+
+    Returns:
+        Stats of the backfill: pages, saved, failed, seconds and pages_per_second
+    """
+    start_time = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    stats = {"pages": 0, "saved": 0, "failed": 0}
+    pending: List[Dict[str, Any]] = []
+
+    def write(articles: List[Dict[str, Any]]) -> None:
+        storage.save_articles(articles)
+        stats["saved"] += len(articles)
+        print(f"Backfilled {stats['saved']} articles ({stats['pages'] / (time.perf_counter() - start_time):.0f} pages/s)")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight: deque = deque()
+
+        def collect() -> None:
+            articles, failed = in_flight.popleft().result()
+            stats["pages"] += len(articles) + failed
+            stats["failed"] += failed
+            for title, url, article_time, content, fingerprint in articles:
+                pending.append({
+                    "title": title, "url": url, "time": article_time, "content": content,
+                    "simhash": fingerprint, "source": "cnn"
+                })
+
+        for chunk in iter_chunks(source, chunk_size):
+            # Bound the chunks in flight so a large archive is not read into memory at once
+            if len(in_flight) >= workers * 2:
+                collect()
+            in_flight.append(executor.submit(parse_chunk, chunk))
+            if len(pending) >= batch_size:
+                write(pending)
+                pending = []
+        while in_flight:
+            collect()
+            if len(pending) >= batch_size:
+                write(pending)
+                pending = []
+    if pending:
+        write(pending)
+
+    stats["seconds"] = time.perf_counter() - start_time
+    stats["pages_per_second"] = stats["pages"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    return stats
+
+if __name__ == "__main__":
+    # Seed or rebuild a database from saved pages:
+    #   python backfill.py pages/ cnn_news.db
+    #   python backfill.py pages.tar.gz cnn_news.db --workers 8
+    parser = argparse.ArgumentParser(description="Load saved CNN Lite article pages into the database")
+    parser.add_argument("source", help="Directory, zip archive or tar archive of saved article pages")
+    parser.add_argument("db_file", nargs="?", default="cnn_news.db", help="SQLite database to write to")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, one per CPU by default")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Pages per task sent to a worker")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Articles written per transaction")
+    args = parser.parse_args()
+
+    storage = NewsStorage(args.db_file)
+    try:
+        stats = backfill(args.source, storage, args.workers, args.chunk_size, args.batch_size)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    finally:
+        storage.close()
+    print(f"Backfilled {stats['saved']} articles from {stats['pages']} pages in {stats['seconds']:.1f}s "
+          f"({stats['pages_per_second']:.0f} pages/s, {stats['failed']} skipped)")
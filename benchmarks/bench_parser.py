@@ -0,0 +1,100 @@
+"""Benchmark CNN Lite extraction over the synthetic pages in benchmarks/fixtures.
+
+The fixtures are not saved from CNN. They use the CNN Lite markup with
+paragraphs of random economic words, in three article sizes and a homepage.
+
+Compares the original per-call XPath extraction with cnn_lite_parser and
+reports parse latency and peak allocations for each page.
+
+Usage:
+    python benchmarks/bench_parser.py [iterations]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Any, List, Tuple
+
+from lxml import html
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cnn_lite_parser import extract_article, extract_article_urls_and_titles
+from time_converter import parse_time_to_utc, convert_utc_to_eastern
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BASE_URL = "https://lite.cnn.com"
+
+def legacy_extract_article_urls_and_titles(page: str) -> List[Tuple[str, str]]:
+    """The extraction previously inlined in CNNCrawler.get_article_urls_and_titles."""
+    tree = html.fromstring(page)
+    articles = []
+    for element in tree.xpath('//li[@class="card--lite"]'):
+        link_elements = element.xpath('./a/@href')
+        if not link_elements:
+            continue
+        title_elements = element.xpath('./a/text()')
+        title = title_elements[0].strip() if title_elements else "Unknown Title"
+        articles.append((f"{BASE_URL}{link_elements[0]}", title))
+    articles.reverse()
+    return articles
+
+def legacy_extract_article(page: str, url: str, title: str) -> Dict[str, Any]:
+    """The extraction previously inlined in CNNCrawler.parse_article."""
+    tree = html.fromstring(page)
+    article_time = None
+    time_elements = tree.xpath('//p[@class="timestamp--lite"]')
+    if time_elements:
+        time_text = time_elements[0].text_content().strip()
+        try:
+            time_str = time_text.replace("Updated:", "").strip()
+            article_time = convert_utc_to_eastern(parse_time_to_utc(time_str))
+        except Exception as e:
+            print(f"Error parsing time {time_text}: {e}")
+    content_paragraphs = []
+    for p in tree.xpath('//p[@class="paragraph--lite"]'):
+        if p.text_content():
+            content_paragraphs.append(p.text_content().strip())
+    content = '\n'.join([p for p in content_paragraphs if p])
+    return {"title": title, "url": url, "time": article_time, "content": content}
+
+def measure(func: Callable[[], Any], iterations: int) -> Tuple[float, int]:
+    """Return the mean latency in milliseconds and the peak allocated bytes of one call."""
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    latency = (time.perf_counter() - start) / iterations * 1000
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latency, peak
+
+def main(iterations: int) -> None:
+    print(f"{'page':<28} {'before ms':>10} {'after ms':>10} {'before KiB':>11} {'after KiB':>10}")
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if not name.endswith(".html"):
+            continue
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            raw = f.read()
+        text = raw.decode("utf-8")
+        url = f"{BASE_URL}/{name}"
+
+        if name.startswith("cnn_lite_home"):
+            before = lambda: legacy_extract_article_urls_and_titles(text)
+            after = lambda: extract_article_urls_and_titles(raw, BASE_URL, "utf-8")
+        else:
+            before = lambda: legacy_extract_article(text, url, "title")
+            after = lambda: extract_article(raw, url, "title", "utf-8")
+
+        # The new engine must return exactly what the old code returned
+        assert before() == after(), f"Output mismatch for {name}"
+
+        before_ms, before_peak = measure(before, iterations)
+        after_ms, after_peak = measure(after, iterations)
+        print(f"{name:<28} {before_ms:>10.3f} {after_ms:>10.3f} {before_peak / 1024:>11.1f} {after_peak / 1024:>10.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,42 @@
+"""Measure how long it takes from a cold start until the first crawl can begin.
+
+Each run happens in a fresh interpreter, inside a temporary directory so a new
+database is created.
+
+Usage:
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = f"""
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {ROOT_DIR!r})
+import economic_news
+imported = time.perf_counter()
+processor = economic_news.NewsProcessor()
+constructed = time.perf_counter()
+print(imported - start, constructed - start)
+"""
+
+def main(runs: int) -> None:
+    import_times, ready_times = [], []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_SCRIPT], cwd=tmp_dir, capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+        import_time, ready_time = map(float, output.split())
+        import_times.append(import_time)
+        ready_times.append(ready_time)
+
+    print(f"import economic_news: {min(import_times) * 1000:8.1f} ms (best of {runs})")
+    print(f"ready to crawl:       {min(ready_times) * 1000:8.1f} ms (best of {runs})")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
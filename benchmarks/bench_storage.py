@@ -0,0 +1,84 @@
+"""Micro-benchmark: per-call sqlite3.connect() versus the persistent NewsStorage.
+
+Usage:
+    python benchmarks/bench_storage.py [number_of_articles]
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_storage import NewsStorage
+
+def make_articles(number: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "title": f"Benchmark article {i}",
+            "url": f"https://lite.cnn.com/2025/03/03/business/benchmark-{i}/index.html",
+            "time": "2025-03-03T17:39:00-05:00",
+            "content": "Stocks rallied on Monday as investors weighed new tariffs. " * 40,
+        }
+        for i in range(number)
+    ]
+
+def per_call_pattern(db_file: str, articles: List[Dict[str, Any]]) -> None:
+    """The original pattern: one connection per title check and per save, on the original schema."""
+    conn = sqlite3.connect(db_file)
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS articles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        url TEXT NOT NULL UNIQUE,
+        time TIMESTAMP,
+        content TEXT
+    )
+    ''')
+    conn.commit()
+    conn.close()
+    for article in articles:
+        conn = sqlite3.connect(db_file)
+        count = conn.execute("SELECT COUNT(*) FROM articles WHERE title = ?", (article["title"],)).fetchone()[0]
+        conn.close()
+        if count:
+            continue
+        conn = sqlite3.connect(db_file)
+        conn.execute(
+            "INSERT INTO articles (title, url, time, content) VALUES (?, ?, ?, ?)",
+            (article["title"], article["url"], article["time"], article["content"])
+        )
+        conn.commit()
+        conn.close()
+    for _ in range(20):
+        conn = sqlite3.connect(db_file)
+        conn.execute("SELECT title, time, content FROM articles ORDER BY time DESC LIMIT 10").fetchall()
+        conn.close()
+
+def storage_pattern(db_file: str, articles: List[Dict[str, Any]]) -> None:
+    storage = NewsStorage(db_file)
+    for article in articles:
+        if storage.title_exists(article["title"]):
+            continue
+        storage.save_article(article)
+    for _ in range(20):
+        storage.get_articles_by_number(10)
+    storage.close()
+
+def run(name: str, func, articles: List[Dict[str, Any]]) -> float:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = os.path.join(tmp_dir, "bench.db")
+        start = time.perf_counter()
+        func(db_file, articles)
+        elapsed = time.perf_counter() - start
+    print(f"{name:<12} {len(articles)} articles in {elapsed:.3f}s ({len(articles) / elapsed:.0f} articles/s)")
+    return elapsed
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    articles = make_articles(number)
+    per_call = run("per-call", per_call_pattern, articles)
+    persistent = run("persistent", storage_pattern, articles)
+    print(f"Speedup: {per_call / persistent:.1f}x")
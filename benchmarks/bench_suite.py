@@ -0,0 +1,287 @@
+"""Offline end-to-end benchmark suite.
+
+Runs the crawler, storage, analyzer and Discord delivery against local stand-ins
+(see benchmarks/offline.py), so results do not depend on CNN, Gemini or Discord
+and can be compared between commits. Every scenario gets a fresh database in a
+temporary directory.
+
+Scenarios:
+    crawl     CNNCrawler.crawl over homepages of different sizes
+    sources   NewsPipeline over sites of different latencies at once, against one site after another
+    pipeline  NewsPipeline from the homepage to delivered Discord messages
+    database  lookups, batch inserts and reads on databases of different sizes
+    batching  NewsProcessor.process_articles with different batch token budgets
+
+Usage:
+    python benchmarks/bench_suite.py [--output report.json] [--quick]
+        [--latency 0.05] [--llm-delay 0.2] [--discord-delay 0.05]
+        [--scenarios crawl,sources,pipeline,database,batching]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from offline import FixtureServer, FakeGenaiClient, load_fixture, make_offline_discord_client
+from cnn_lite_parser import extract_article
+from economic_news import CNNCrawler, CrawlEngine, CNNLiteSource, GeminiAnalyzer, NewsProcessor, NewsPipeline
+from news_storage import NewsStorage
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHANNEL_ID = 1
+
+def make_crawler(storage: NewsStorage, server: FixtureServer) -> CNNCrawler:
+    """A crawler pointed at the fixture server, without a politeness limit on the local host."""
+    crawler = CNNCrawler(storage)
+    crawler.base_url = server.base_url
+    crawler.source.rate = crawler.source.capacity = 10000.0
+    crawler.rate_limiter.configure(server.host, rate=10000.0, capacity=10000.0)
+    return crawler
+
+def make_processor(server: FixtureServer, llm_delay: float, discord_delay: float):
+    """A NewsProcessor using the current directory for its database and the offline stand-ins."""
+    os.environ["DISCORD_CHANNEL"] = str(CHANNEL_ID)
+    processor = NewsProcessor()
+    processor.cnn_crawler = make_crawler(processor.storage, server)
+    processor.crawl_engine = CrawlEngine(processor.cnn_crawler)
+    processor.gemini_analyzer.gemini_client = FakeGenaiClient(llm_delay)
+    processor.discord_client, channel = make_offline_discord_client(discord_delay, CHANNEL_ID)
+    return processor, channel
+
+def make_articles(count: int) -> List[Dict[str, Any]]:
+    """Articles with unique titles and URLs and the content of the synthetic fixture pages."""
+    pages = [load_fixture(name) for name in ("cnn_lite_article_short.html", "cnn_lite_article_medium.html", "cnn_lite_article_long.html")]
+    contents = [extract_article(page, "", "", "utf-8")["content"] for page in pages]
+    now = datetime.utcnow()
+    return [
+        {
+            "title": f"Benchmark story {i:06d}",
+            "url": f"https://lite.cnn.com/2025/03/03/business/story-{i:06d}/index.html",
+            "time": now - timedelta(minutes=i),
+            "content": contents[i % len(contents)],
+        }
+        for i in range(count)
+    ]
+
+def timed(function: Callable[[], Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    result = function()
+    return {"seconds": time.perf_counter() - start, "result": result}
+
+def bench_crawl(sizes: List[int], latency: float) -> List[Dict[str, Any]]:
+    results = []
+    for cards in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            server = FixtureServer(cards, latency).start()
+            storage = NewsStorage(os.path.join(tmp_dir, "bench.db"))
+            try:
+                crawler = make_crawler(storage, server)
+                run = timed(crawler.crawl)
+                results.append({
+                    "cards": cards,
+                    "latency": latency,
+                    "max_in_flight": crawler.max_in_flight,
+                    "seconds": run["seconds"],
+                    "saved": run["result"],
+                    "requests": server.requests,
+                    "articles_per_second": run["result"] / run["seconds"] if run["seconds"] > 0 else 0.0,
+                })
+            finally:
+                storage.close()
+                server.stop()
+    return results
+
+def bench_sources(cards: int, latencies: List[float]) -> List[Dict[str, Any]]:
+    results = []
+    for mode in ("sequential", "engine"):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            servers = [FixtureServer(cards, latency, site=f"site{i} ").start() for i, latency in enumerate(latencies)]
+            storage = NewsStorage(os.path.join(tmp_dir, "bench.db"))
+            try:
+                crawler = CNNCrawler(storage)
+                sources = [
+                    CNNLiteSource(f"site{i}", server.base_url, rate=10000.0, capacity=10000.0)
+                    for i, server in enumerate(servers)
+                ]
+                analyzer = GeminiAnalyzer(storage)
+                analyzer.gemini_client = FakeGenaiClient(0.0)
+                if mode == "sequential":
+                    engines = [CrawlEngine(crawler, [source]) for source in sources]
+                else:
+                    engines = [CrawlEngine(crawler, sources)]
+                pipelines = [NewsPipeline(crawler, analyzer, lambda analysis: None, engine=engine) for engine in engines]
+                run = timed(lambda: sum(pipeline.run() for pipeline in pipelines))
+                slowest = max(seconds for engine in engines for seconds in engine.last_listing_seconds.values())
+                results.append({
+                    "mode": mode,
+                    "cards": cards,
+                    "latencies": latencies,
+                    "seconds": run["seconds"],
+                    "slowest_listing_seconds": slowest,
+                    "saved": run["result"],
+                    "requests": sum(server.requests for server in servers),
+                })
+            finally:
+                storage.close()
+                for server in servers:
+                    server.stop()
+    return results
+
+def bench_pipeline(sizes: List[int], latency: float, llm_delay: float, discord_delay: float) -> List[Dict[str, Any]]:
+    results = []
+    cwd = os.getcwd()
+    for cards in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            server = FixtureServer(cards, latency).start()
+            processor, channel = make_processor(server, llm_delay, discord_delay)
+            try:
+                pipeline = NewsPipeline(
+                    processor.cnn_crawler, processor.gemini_analyzer,
+                    lambda analysis: processor.discord_client.send_message_sync(CHANNEL_ID, analysis),
+                    max_concurrent_analyses=processor.max_concurrent_analyses,
+                    relevance_filter=processor.relevance_filter,
+                )
+                run = timed(pipeline.run)
+                stats = dict(pipeline.last_run_stats)
+                stats.update({
+                    "cards": cards,
+                    "latency": latency,
+                    "llm_delay": llm_delay,
+                    "discord_delay": discord_delay,
+                    "llm_calls": processor.gemini_analyzer.gemini_client.models.calls,
+                    "discord_messages": len(channel.messages),
+                    "articles_per_second": stats["saved"] / run["seconds"] if run["seconds"] > 0 else 0.0,
+                })
+                results.append(stats)
+            finally:
+                processor.discord_client.stop_sync()
+                processor.storage.close()
+                server.stop()
+                os.chdir(cwd)
+    return results
+
+def bench_database(sizes: List[int], batch_size: int = 100) -> List[Dict[str, Any]]:
+    results = []
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage = NewsStorage(os.path.join(tmp_dir, "bench.db"))
+            try:
+                articles = make_articles(rows + batch_size)
+                seed = timed(lambda: [storage.save_articles(articles[i:i + 500]) for i in range(0, rows, 500)])
+                probe = [article["title"] for article in articles[rows - batch_size // 2:rows + batch_size // 2]]
+                lookup = timed(lambda: storage.existing_titles(probe))
+                insert = timed(lambda: storage.save_articles(articles[rows:]))
+                latest = timed(lambda: storage.get_articles_by_number(100))
+                window = timed(lambda: storage.get_articles_by_time(datetime.utcnow() - timedelta(hours=24)))
+                result = {
+                    "rows": rows,
+                    "seed_seconds": seed["seconds"],
+                    "existing_titles_ms": lookup["seconds"] * 1000,
+                    "save_batch_ms": insert["seconds"] * 1000,
+                    "batch_size": batch_size,
+                    "latest_100_ms": latest["seconds"] * 1000,
+                    "last_24h_ms": window["seconds"] * 1000,
+                    "last_24h_rows": len(window["result"]),
+                    "database_bytes": storage.database_size(),
+                }
+                if storage.fts_enabled:
+                    search = timed(lambda: storage.search_articles("inflation", 20))
+                    result["search_ms"] = search["seconds"] * 1000
+                results.append(result)
+            finally:
+                storage.close()
+    return results
+
+def bench_batching(budgets: List[int], articles: int, llm_delay: float, discord_delay: float) -> List[Dict[str, Any]]:
+    results = []
+    cwd = os.getcwd()
+    for budget in budgets:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            server = FixtureServer(0).start()
+            processor, channel = make_processor(server, llm_delay, discord_delay)
+            try:
+                processor.gemini_analyzer.batch_token_budget = budget
+                processor.relevance_filter = None
+                batch = make_articles(articles)
+                run = timed(lambda: processor.process_articles(batch))
+                models = processor.gemini_analyzer.gemini_client.models
+                results.append({
+                    "token_budget": budget,
+                    "articles": articles,
+                    "llm_delay": llm_delay,
+                    "seconds": run["seconds"],
+                    "llm_calls": models.calls,
+                    "prompt_chars": models.prompt_chars,
+                    "articles_per_call": articles / models.calls if models.calls else 0.0,
+                })
+            finally:
+                processor.discord_client.stop_sync()
+                processor.storage.close()
+                server.stop()
+                os.chdir(cwd)
+    return results
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", default="bench_report.json", help="Where to write the JSON report")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes, for a fast smoke run")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the local CNN Lite server waits per request")
+    parser.add_argument("--llm-delay", type=float, default=0.2, help="Seconds the fake Gemini client waits per call")
+    parser.add_argument("--discord-delay", type=float, default=0.05, help="Seconds the fake Discord channel waits per message")
+    parser.add_argument("--scenarios", default="crawl,sources,pipeline,database,batching", help="Comma-separated scenarios to run")
+    args = parser.parse_args()
+
+    crawl_sizes = [10, 25] if args.quick else [10, 50, 100]
+    db_sizes = [1000, 5000] if args.quick else [1000, 10000, 50000]
+    budgets = [2000, 8000] if args.quick else [2000, 8000, 32000]
+    batch_articles = 20 if args.quick else 60
+    scenarios = set(args.scenarios.split(","))
+
+    report: Dict[str, Any] = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": vars(args),
+        "results": {},
+    }
+    if "crawl" in scenarios:
+        print("Running crawl scenario...")
+        report["results"]["crawl"] = bench_crawl(crawl_sizes, args.latency)
+    if "sources" in scenarios:
+        print("Running sources scenario...")
+        report["results"]["sources"] = bench_sources(crawl_sizes[-1], [args.latency, args.latency * 2, args.latency * 4])
+    if "pipeline" in scenarios:
+        print("Running pipeline scenario...")
+        report["results"]["pipeline"] = bench_pipeline(crawl_sizes, args.latency, args.llm_delay, args.discord_delay)
+    if "database" in scenarios:
+        print("Running database scenario...")
+        report["results"]["database"] = bench_database(db_sizes)
+    if "batching" in scenarios:
+        print("Running batching scenario...")
+        report["results"]["batching"] = bench_batching(budgets, batch_articles, args.llm_delay, args.discord_delay)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
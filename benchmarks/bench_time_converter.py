@@ -0,0 +1,45 @@
+"""Benchmark timestamp parsing throughput in time_converter.
+
+A crawl sees the same few timestamps over and over, so the input cycles through
+a small set of distinct strings like the ones on CNN Lite article pages.
+
+Usage:
+    python benchmarks/bench_time_converter.py [number_of_timestamps]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from time_converter import parse_time_to_utc, parse_times_to_utc, convert_utc_to_eastern
+
+def make_timestamps(number: int, distinct: int = 40) -> list:
+    hours = [f"{h}:{m:02d} {ampm}" for h in range(1, 13) for m in (2, 17, 31, 48) for ampm in ("AM", "PM")]
+    return [f"{hours[i % distinct]} EDT, Sat March 15, 2025" for i in range(number)]
+
+def run(name: str, func, timestamps: list) -> None:
+    start = time.perf_counter()
+    func(timestamps)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {len(timestamps) / elapsed:>12,.0f} timestamps/s")
+
+def uncached(timestamps: list) -> None:
+    for time_str in timestamps:
+        convert_utc_to_eastern(parse_time_to_utc.__wrapped__(time_str))
+
+def memoized(timestamps: list) -> None:
+    parse_time_to_utc.cache_clear()
+    for time_str in timestamps:
+        convert_utc_to_eastern(parse_time_to_utc(time_str))
+
+def batch(timestamps: list) -> None:
+    parse_time_to_utc.cache_clear()
+    for utc_dt in parse_times_to_utc(timestamps):
+        convert_utc_to_eastern(utc_dt)
+
+if __name__ == "__main__":
+    timestamps = make_timestamps(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
+    run("uncached", uncached, timestamps)
+    run("memoized", memoized, timestamps)
+    run("batch", batch, timestamps)
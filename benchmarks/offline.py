@@ -0,0 +1,184 @@
+"""Local stand-ins for CNN Lite, the genai client and Discord, used by the benchmarks.
+
+- FixtureServer serves a CNN Lite homepage with any number of cards, and the synthetic
+  article pages in benchmarks/fixtures, with a configurable delay per request. The
+  fixtures use the CNN Lite markup with random economic words, not saved CNN pages.
+- FakeGenaiClient answers generate_content after a configurable delay.
+- OfflineDiscordClient is a BackgroundDiscordClient that never logs in and sends to
+  a fake channel with a configurable delay per message.
+"""
+import asyncio
+import http.server
+import os
+import random
+import re
+import sys
+import threading as td
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+class FixtureServer:
+    CARD_PATTERN = re.compile(rb'\s*<li class="card--lite">.*?</li>', re.DOTALL)
+    PARAGRAPH_PATTERN = re.compile(rb'(<p class="paragraph--lite">)(.*?)(</p>)', re.DOTALL)
+
+    def __init__(self, cards: int = 100, latency: float = 0.0, site: str = ""):
+        """Serve synthetic pages with the CNN Lite markup on a local port.
+
+        Args:
+            cards: Number of article cards on the homepage
+            latency: Seconds to wait before answering each request
+            site: Prefix of the titles and seed of the content, so servers with
+                different sites do not serve the same stories
+        """
+        self.cards = cards
+        self.latency = latency
+        self.site = site
+        self.requests = 0
+        self._lock = td.Lock()
+
+        home = load_fixture("cnn_lite_home.html")
+        card_matches = list(self.CARD_PATTERN.finditer(home))
+        self._home_head = home[:card_matches[0].start()]
+        self._home_tail = home[card_matches[-1].end():]
+        self._card_template = card_matches[0].group(0)
+        self._articles = [
+            load_fixture(name) for name in sorted(os.listdir(FIXTURES_DIR))
+            if name.startswith("cnn_lite_article")
+        ]
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[td.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self._server.server_port}"
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}"
+
+    def homepage(self) -> bytes:
+        cards = []
+        for i in range(self.cards):
+            card = re.sub(rb'href="[^"]*"', f'href="/2025/03/03/business/story-{i:05d}/index.html"'.encode(), self._card_template)
+            card = re.sub(rb'(<a [^>]*>\s*)', rb'\g<1>' + f"{self.site}Story {i:05d}: ".encode(), card)
+            cards.append(card)
+        return self._home_head + b"".join(cards) + self._home_tail
+
+    def article(self, path: str) -> bytes:
+        """One of the fixture pages, with the words of each paragraph shuffled per story.
+
+        The shuffle keeps the page size and parsing cost, but gives every story
+        distinct content, so stories are not taken for near-duplicates.
+        """
+        match = re.search(r"story-(\d+)", path)
+        index = int(match.group(1)) if match else 0
+        rng = random.Random(f"{self.site}{index}" if self.site else index)
+
+        def shuffle(paragraph: re.Match) -> bytes:
+            words = paragraph.group(2).split()
+            rng.shuffle(words)
+            return paragraph.group(1) + b" ".join(words) + paragraph.group(3)
+
+        return self.PARAGRAPH_PATTERN.sub(shuffle, self._articles[index % len(self._articles)])
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.homepage() if self.path == "/" else server.article(self.path)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        self._thread = td.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+class FakeGenaiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeGenaiModels:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+        self.prompt_chars = 0
+        self._lock = td.Lock()
+
+    def generate_content(self, model: str, contents: str) -> FakeGenaiResponse:
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(contents)
+        time.sleep(self.delay)
+        # A plausible analysis: a few lines per article block in the prompt
+        articles = max(1, contents.count("\n\n"))
+        lines = [f"Summary line {i} for the analyzed articles." for i in range(articles * 3)]
+        return FakeGenaiResponse("\n".join(lines))
+
+class FakeGenaiClient:
+    def __init__(self, delay: float = 0.0):
+        """Stand-in for genai.Client that waits delay seconds per call."""
+        self.models = FakeGenaiModels(delay)
+
+class FakeChannel:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.messages: List[str] = []
+
+    async def send(self, content: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.messages.append(content)
+
+def make_offline_discord_client(delay: float = 0.0, channel_id: int = 1):
+    """Create a BackgroundDiscordClient that delivers to a FakeChannel instead of Discord."""
+    from discord_client import BackgroundDiscordClient
+
+    channel = FakeChannel(delay)
+
+    class OfflineDiscordClient(BackgroundDiscordClient):
+        async def start(self, token, *args, **kwargs):
+            await self.on_ready()
+
+        def get_channel(self, requested_id):
+            return channel if requested_id == channel_id else None
+
+        def stop_sync(self):
+            # Finish closing before the loop stops, so no task is left pending at exit
+            async def shutdown():
+                self._delivery_task.cancel()
+                await self.close()
+            asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    client = OfflineDiscordClient("offline")
+    client.wait_until_ready_sync(5)
+    return client, channel
@@ -0,0 +1,153 @@
+from datetime import datetime
+from urllib.parse import urljoin, urlsplit
+from lxml import etree, html
+from typing import List, Dict, Optional, Any, Tuple, Union, Callable
+from time_converter import *
+
+# XPath expressions are compiled once and reused for every page
+CARD_XPATH = etree.XPath('//li[@class="card--lite"]')
+CARD_HREF_XPATH = etree.XPath('./a/@href')
+CARD_TEXT_XPATH = etree.XPath('./a/text()')
+TIMESTAMP_XPATH = etree.XPath('(//p[@class="timestamp--lite"])[1]')
+PARAGRAPH_XPATH = etree.XPath('//p[@class="paragraph--lite"]')
+HEADLINE_XPATH = etree.XPath('(//h2[contains(concat(" ", normalize-space(@class), " "), " headline--lite ")])[1]')
+TITLE_XPATH = etree.XPath('(//title)[1]')
+CANONICAL_XPATH = etree.XPath('(//link[@rel="canonical"]/@href)[1]')
+
+# One HTML parser per encoding, so pages can be parsed straight from bytes
+_parsers: Dict[Optional[str], etree.HTMLParser] = {}
+
+def parse_html(page: Union[str, bytes], encoding: Optional[str] = None) -> html.HtmlElement:
+    """Parse a page into an lxml tree.
+
+    Args:
+        page: Page body as text or raw bytes
+        encoding: Encoding of the bytes, e.g. from the Content-Type header. If None, lxml detects it.
+
+    Returns:
+        Root element of the document
+    """
+    if isinstance(page, str):
+        return html.fromstring(page)
+    parser = _parsers.get(encoding)
+    if parser is None:
+        parser = html.HTMLParser(encoding=encoding)
+        _parsers[encoding] = parser
+    return html.fromstring(page, parser=parser)
+
+def parse_cnn_lite_time(time_text: str) -> Optional[datetime]:
+    """Parse a CNN Lite timestamp like "Updated: 5:39 PM EST, Mon March 3, 2025" into US/Eastern time."""
+    # Remove "Updated:" and parse the rest
+    time_str = time_text.replace("Updated:", "").strip()
+    return convert_utc_to_eastern(parse_time_to_utc(time_str))
+
+def extract_article_urls_and_titles(page: Union[str, bytes], base_url: str,
+                                    encoding: Optional[str] = None, card_xpath: etree.XPath = CARD_XPATH,
+                                    href_xpath: etree.XPath = CARD_HREF_XPATH,
+                                    text_xpath: etree.XPath = CARD_TEXT_XPATH) -> List[Tuple[str, str]]:
+    """Extract article URLs and titles from a CNN Lite homepage, newest last.
+
+    Other lite sites with one card element per article pass their own XPath expressions.
+    """
+    tree = parse_html(page, encoding)
+
+    # Links relative to the site root are joined by concatenation, urljoin is only needed for the others
+    root = base_url.rstrip("/") if not urlsplit(base_url).path.strip("/") else None
+
+    articles = []
+    # Based on the HTML structure, articles are in <li class="card--lite"> elements
+    for element in card_xpath(tree):
+        # Extract the URL
+        link_elements = href_xpath(element)
+        if not link_elements:
+            continue
+
+        # Extract the title from inside the <a> tag
+        title_elements = text_xpath(element)
+        title = title_elements[0].strip() if title_elements else "Unknown Title"
+
+        href = str(link_elements[0]).strip()
+        if root is not None and href.startswith("/") and not href.startswith("//"):
+            articles.append((f"{root}{href}", title))
+        else:
+            articles.append((urljoin(base_url, href), title))
+
+    # Reverse the list of articles so newest are last
+    articles.reverse()
+
+    return articles
+
+def extract_article(page: Union[str, bytes], url: str, title: str,
+                    encoding: Optional[str] = None) -> Dict[str, Any]:
+    """Extract the time and content of a CNN Lite article page.
+
+    Returns:
+        Article dictionary with title, url, time and content
+    """
+    return extract_article_from_tree(parse_html(page, encoding), url, title)
+
+def extract_saved_article(page: Union[str, bytes], url: Optional[str] = None,
+                          encoding: Optional[str] = None) -> Dict[str, Any]:
+    """Extract an article from a saved CNN Lite page, without the homepage card it was linked from.
+
+    The title comes from the headline, or the <title> element without the section suffix,
+    and the URL from the canonical link.
+
+    Args:
+        page: Page body as text or raw bytes
+        url: URL used when the page has no canonical link
+        encoding: Encoding of the bytes. If None, lxml detects it.
+
+    Returns:
+        Article dictionary with title, url, time and content
+    """
+    tree = parse_html(page, encoding)
+
+    title = ""
+    headline_elements = HEADLINE_XPATH(tree)
+    if headline_elements:
+        title = headline_elements[0].text_content().strip()
+    if not title:
+        title_elements = TITLE_XPATH(tree)
+        if title_elements:
+            title = title_elements[0].text_content().rsplit(" | ", 1)[0].strip()
+
+    canonical = CANONICAL_XPATH(tree)
+    if canonical:
+        url = str(canonical[0]).strip()
+
+    return extract_article_from_tree(tree, url, title or "Unknown Title")
+
+def extract_article_from_tree(tree: html.HtmlElement, url: str, title: str,
+                              timestamp_xpath: etree.XPath = TIMESTAMP_XPATH,
+                              paragraph_xpath: etree.XPath = PARAGRAPH_XPATH,
+                              parse_time: Callable[[str], Optional[datetime]] = parse_cnn_lite_time) -> Dict[str, Any]:
+    """Extract the time and content of a parsed CNN Lite article page.
+
+    Other lite sites pass their own XPath expressions and time parser.
+    """
+    # Extract time - CNN Lite uses p.timestamp--lite for time
+    article_time = None
+    time_elements = timestamp_xpath(tree)
+    if time_elements:
+        time_text = time_elements[0].text_content().strip()
+        # Extract time from format like "Updated: 5:39 PM EST, Mon March 3, 2025"
+        try:
+            article_time = parse_time(time_text)
+        except Exception as e:
+            print(f"Error parsing time {time_text}: {e}")
+
+    # Extract content paragraphs - CNN Lite uses p.paragraph--lite for content.
+    # text_content() includes text from child elements like <em> or <a>
+    content_paragraphs = []
+    for p in paragraph_xpath(tree):
+        text = p.text_content().strip()
+        if text:
+            content_paragraphs.append(text)
+
+    return {
+        "title": title,
+        "url": url,
+        "time": article_time,
+        "content": '\n'.join(content_paragraphs)
+    }
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple
+from metrics import METRICS, Trace
+from news_sources import NewsSource
+
+LISTING_SECONDS = METRICS.histogram("news_listing_seconds", "Time spent fetching and parsing the listing of a source by source")
+
+class CrawlEngine:
+    def __init__(self, crawler: Any, sources: Optional[List[NewsSource]] = None):
+        """The news sources crawled together by NewsPipeline, with the limits of each.
+
+        The listings of all sources are fetched at once, then every source gets its own
+        article workers and a rate limit for its host. The HTTP session, the storage,
+        the title check and the near-duplicate detector are shared, so a story found on
+        two sites is only analyzed once. A crawl takes about as long as its slowest source.
+
+        Args:
+            crawler: CNNCrawler whose HTTP layer and storage are used for every source
+            sources: Sources to crawl. If None, the crawler's own source.
+        """
+        self.crawler = crawler
+        self.sources: Dict[str, NewsSource] = {}
+        for source in sources if sources is not None else [crawler.source]:
+            self.register(source)
+
+        # Seconds spent on the listing of each source in the last crawl
+        self.last_listing_seconds: Dict[str, float] = {}
+
+    def register(self, source: NewsSource) -> None:
+        """Add a source, or replace the one with the same name, and apply its limits."""
+        self.sources[source.name] = source
+        self.crawler.rate_limiter.configure(source.host, source.rate, source.capacity)
+        # One pool per host, each large enough for the article workers of its source
+        self.crawler.resize_connection_pool(
+            max(4, len(self.sources)),
+            max(self.fetch_workers(source) for source in self.sources.values())
+        )
+
+    def fetch_workers(self, source: NewsSource) -> int:
+        """Number of article requests a source may have in flight at once."""
+        return max(1, source.max_in_flight or self.crawler.max_in_flight)
+
+    def fetch_listing(self, source: NewsSource, trace: Trace) -> Tuple[List[Tuple[str, str]], Any]:
+        start = time.perf_counter()
+        try:
+            with trace.span("homepage", source=source.name), LISTING_SECONDS.time(source=source.name):
+                return self.crawler.fetch_listing(source)
+        except Exception as e:
+            # One failing site does not stop the others
+            print(f"Error crawling the listing of {source.name}: {e}")
+            return [], None
+        finally:
+            self.last_listing_seconds[source.name] = time.perf_counter() - start
+
+    def fetch_listings(self, sources: Optional[List[NewsSource]] = None,
+                       trace: Optional[Trace] = None) -> List[Tuple[NewsSource, List[Tuple[str, str]], Any]]:
+        """Fetch the listings of all sources at once, so the slowest site sets the pace, not their sum.
+
+        Args:
+            sources: Sources whose listings are fetched. If None, every registered source.
+            trace: Trace that gets a span per listing, or None
+
+        Returns:
+            List of (source, article URLs and titles, listing response) in the order of sources.
+            A source whose listing failed has no articles and no response.
+        """
+        trace = trace if trace is not None else Trace("listings", enabled=False)
+        sources = sources if sources is not None else list(self.sources.values())
+        self.last_listing_seconds = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(sources)), thread_name_prefix="source") as executor:
+            listings = list(executor.map(lambda source: self.fetch_listing(source, trace), sources))
+        return [(source, article_data, response) for source, (article_data, response) in zip(sources, listings)]
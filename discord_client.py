@@ -1,8 +1,38 @@
 import discord
 import asyncio
-import time
 import threading as td
-from concurrent.futures import ThreadPoolExecutor
+import time
+from concurrent.futures import Future
+from metrics import METRICS
+
+DISCORD_SEND_SECONDS = METRICS.histogram("news_discord_send_seconds", "Latency of sending one Discord message, including rate-limit waits")
+DISCORD_MESSAGES = METRICS.counter("news_discord_messages_total", "Discord messages, by result (sent, rate_limited or error)")
+
+# Discord rejects messages longer than this many characters
+MESSAGE_LIMIT = 2000
+
+def pack_message(content, limit=MESSAGE_LIMIT):
+    """Pack the lines of content into as few messages as possible, each at most limit characters."""
+    messages = []
+    current = ''
+    for line in content.split('\n'):
+        # Hard-split lines that are too long for a single message
+        while len(line) > limit:
+            if current.strip():
+                messages.append(current.strip('\n'))
+            current = ''
+            messages.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            if current.strip():
+                messages.append(current.strip('\n'))
+            current = line
+        else:
+            current = candidate
+    if current.strip():
+        messages.append(current.strip('\n'))
+    return messages
 
 class BackgroundDiscordClient(discord.Client):
     def __init__(self, token, *args, **kwargs):
@@ -10,30 +40,103 @@ class BackgroundDiscordClient(discord.Client):
         # Create a new event loop
         self._loop = asyncio.new_event_loop()
         td.Thread(target=self._start_loop, daemon=True).start()
-        self._executor = ThreadPoolExecutor(max_workers=1)
-        # Connect to Discord
+        # Set once the client has logged in and the cache is ready
+        self._ready_event = td.Event()
+        self._ready_async = None
+        # Outbound messages are delivered in order by a single worker on the loop
+        self._queue = None
+        self._delivery_task = None
+        asyncio.run_coroutine_threadsafe(self._start_delivery(), self._loop).result()
+        # Connect to Discord in the background
         asyncio.run_coroutine_threadsafe(self.start(token), self._loop)
-        time.sleep(5)
 
     def _start_loop(self):
         asyncio.set_event_loop(self._loop)
         self._loop.run_forever()
 
+    async def on_ready(self):
+        self._ready_event.set()
+        self._ready_async.set()
+
+    def wait_until_ready_sync(self, timeout=None):
+        """Block until the client is ready.
+
+        Args:
+            timeout: Maximum number of seconds to wait. If None, waits forever.
+
+        Returns:
+            True if the client is ready, False if the timeout expired
+        """
+        return self._ready_event.wait(timeout)
+
+    async def _start_delivery(self):
+        self._ready_async = asyncio.Event()
+        self._queue = asyncio.Queue()
+        self._delivery_task = self._loop.create_task(self._delivery_worker())
+
+    async def _delivery_worker(self):
+        while True:
+            channel_id, messages, future = await self._queue.get()
+            try:
+                sent = await self._deliver(channel_id, messages)
+                if not future.done():
+                    future.set_result(sent)
+            except Exception as e:
+                print(f"Error sending message to channel {channel_id}: {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, channel_id, messages):
+        """Send messages to a channel, waiting out rate limits. Returns the number of messages sent."""
+        await asyncio.wait_for(self._ready_async.wait(), timeout=60)
+        channel = self.get_channel(channel_id)
+        if not channel:
+            print(f"Channel with ID {channel_id} not found.")
+            return 0
+
+        sent = 0
+        for message in messages:
+            start = time.perf_counter()
+            while True:
+                # discord.py already paces requests by the rate-limit headers,
+                # these only handle the limits it gives up on
+                try:
+                    await channel.send(message)
+                    break
+                except discord.RateLimited as e:
+                    DISCORD_MESSAGES.inc(result="rate_limited")
+                    await asyncio.sleep(e.retry_after)
+                except discord.HTTPException as e:
+                    if e.status != 429:
+                        DISCORD_MESSAGES.inc(result="error")
+                        raise
+                    DISCORD_MESSAGES.inc(result="rate_limited")
+                    retry_after = getattr(e.response, 'headers', {}).get('Retry-After', 1)
+                    await asyncio.sleep(float(retry_after))
+            DISCORD_SEND_SECONDS.observe(time.perf_counter() - start)
+            DISCORD_MESSAGES.inc(result="sent")
+            sent += 1
+        return sent
+
     def stop_sync(self):
         asyncio.run_coroutine_threadsafe(self.close(), self._loop)
         self._loop.stop()
 
+    def send_message(self, channel_id, content):
+        """Queue content for delivery and return immediately.
+
+        Lines are packed into messages of up to 2000 characters.
+
+        Returns:
+            A concurrent.futures.Future that resolves to the number of messages sent
+        """
+        future = Future()
+        messages = pack_message(content)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (channel_id, messages, future))
+        return future
+
     def send_message_sync(self, channel_id, content):
-        def _send_message_task(channel_id, content):
-            async def _send():
-                channel = self.get_channel(channel_id)
-                if channel:
-                    for chunk in content.split('\n'):
-                        if chunk:
-                            await channel.send(chunk)
-                            await asyncio.sleep(2)
-                else:
-                    print(f"Channel with ID {channel_id} not found.")
-            asyncio.run_coroutine_threadsafe(_send(), self._loop).result()
-
-        self._executor.submit(_send_message_task, channel_id, content).result()
\ No newline at end of file
+        """Send content and block until it has been delivered."""
+        return self.send_message(channel_id, content).result()
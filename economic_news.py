@@ -1,22 +1,58 @@
 import threading as td
 import requests
-import random
-from lxml import html
+from requests.adapters import HTTPAdapter
 import time
-from typing import List, Dict, Optional, Any, Tuple
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from typing import List, Dict, Optional, Any, Tuple, Iterator, Set
 import os
+import hashlib
 from datetime import datetime, timedelta
-import sqlite3
 import dotenv
-from google import genai
-from discord_client import *
 from time_converter import *
+from rate_limiter import *
+from request_health import *
+from news_storage import *
+from cnn_lite_parser import *
+from news_sources import *
+from news_pipeline import *
+from news_scheduler import *
+from relevance import *
+from metrics import *
+from near_duplicates import *
+from news_digest import *
+from crawl_engine import *
 
 # Load environment variables
 dotenv.load_dotenv()
 
+HTTP_REQUEST_SECONDS = METRICS.histogram("news_http_request_seconds", "Latency of crawler HTTP requests, by host")
+HTTP_RESPONSES = METRICS.counter("news_http_responses_total", "Crawler HTTP responses, by host and status")
+HTTP_RETRIES = METRICS.counter("news_http_retries_total", "Crawler HTTP requests retried, by host")
+HTTP_HEDGES = METRICS.counter("news_http_hedges_total", "Hedged crawler HTTP requests, by host and winner")
+HTTP_RESPONSE_BYTES = METRICS.histogram("news_http_response_bytes", "Body size of crawler HTTP responses, by host", SIZE_BUCKETS)
+PARSE_SECONDS = METRICS.histogram("news_parse_article_seconds", "Time spent extracting an article from its page by source")
+ANALYSIS_SECONDS = METRICS.histogram("news_analysis_seconds", "Latency of GeminiAnalyzer.analyze, by result")
+ANALYSIS_PROMPT_CHARS = METRICS.histogram("news_analysis_prompt_chars", "Size of the prompts sent for analysis", SIZE_BUCKETS)
+ANALYSES = METRICS.counter("news_analyses_total", "Analyses, by result (cached, generated or error)")
+NEAR_DUPLICATE_DIFF_WORDS = METRICS.histogram(
+    "news_near_duplicate_diff_words", "Words that differ between a near-duplicate and the article it matches",
+    (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
 class CNNCrawler:
-    def __init__(self):
+    # FTS5 queries for the topics the analysis cares about
+    TOPIC_QUERIES = {
+        "economy": 'economy OR economic OR inflation OR recession OR gdp OR "jobs report"',
+        "markets": 'stock OR stocks OR "wall street" OR nasdaq OR dow OR earnings OR investors',
+        "bonds": 'bond OR bonds OR treasury OR treasuries OR yield OR yields',
+        "fed": '"federal reserve" OR fed OR "interest rates" OR "rate cut" OR "rate hike"',
+        "dollar": 'dollar OR currency OR currencies',
+        "trade": 'tariff OR tariffs OR trade OR sanctions',
+        "tech": 'apple OR google OR amazon OR microsoft OR nvidia OR tesla OR meta',
+    }
+    
+    def __init__(self, storage: Optional[NewsStorage] = None):
         
         # List of user agents to rotate through
         self.user_agents: List[str] = [
@@ -36,47 +72,91 @@ class CNNCrawler:
             # You can add proxies here
         ]
         
-        # Base URL for CNN Lite
-        self.base_url = "https://lite.cnn.com"
+        # CNN Lite, the source crawled by crawl() unless another one is given
+        self.source: NewsSource = CNNLiteSource()
         
         # Database file
         self.db_file = "cnn_news.db"
         
-        # Initialize database
-        self.setup_database()
-    
-    def setup_database(self) -> None:
-        """Set up the SQLite database and create tables if they don't exist."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Create articles table if it doesn't exist
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS articles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            url TEXT NOT NULL UNIQUE,
-            time TIMESTAMP,
-            content TEXT
-        )
-        ''')
+        # Maximum number of article requests in flight at once
+        self.max_in_flight = 4
+        
+        # Number of parsed articles written to the database per transaction
+        self.save_batch_size = 20
+        
+        # Per-host politeness: requests per second and burst size
+        self.rate_limiter = HostRateLimiter(rate=1.0, capacity=2.0)
+        
+        # Per-host timeouts derived from recent response times, instead of a fixed 30 seconds
+        self.latency_tracker = LatencyTracker(min_timeout=3.0, max_timeout=30.0, default_timeout=10.0)
+        self.connect_timeout = 5.0
+        
+        # Attempts per request, retried after a jittered exponential backoff
+        self.max_attempts = 3
+        self.retry_base_delay = 0.5
+        self.retry_max_delay = 10.0
+        # Seconds a request may take in total, across all attempts and the waits between them
+        self.request_deadline = 30.0
         
-        conn.commit()
-        conn.close()
+        # Send a second homepage request when the first is slower than usual, the first response wins
+        self.hedge_homepage = True
+        self.hedge_quantile = 0.9
+        # Sized for the listings of several sources requested at once
+        self._hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
         
-        print(f"Database setup complete: {self.db_file}")
+        # Health scores of proxies and user agents, slow or failing ones are benched for a while
+        self.proxy_health = HealthTracker()
+        self.user_agent_health = HealthTracker()
+        
+        # Shared keep-alive session so concurrent requests reuse connections
+        self.session = requests.Session()
+        self.resize_connection_pool(4, self.max_in_flight)
+        
+        # Send conditional requests and skip pages that did not change
+        self.use_http_cache = True
+        self.http_cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+        self._http_cache_lock = td.Lock()
+        
+        # Runs in a row a new card may fail to be fetched, parsed or saved before it is given up,
+        # so one broken article page does not keep the listing from being cached
+        self.max_card_attempts = 3
+        self._card_failures: Dict[str, int] = {}
+        self._card_failures_lock = td.Lock()
+        
+        # Stats of the last crawl
+        self.last_crawl_stats: Dict[str, Any] = {}
+        
+        # Sources crawled at once save one batch at a time, so near-duplicates across sources are found
+        self._save_lock = td.Lock()
+        
+        # Initialize database, or share the storage passed in
+        self.storage = storage if storage is not None else NewsStorage(self.db_file)
+        self.db_file = self.storage.db_file
+        
+        # Marks saved articles whose content nearly matches a stored one, or None to skip fingerprinting
+        self.near_duplicates: Optional[NearDuplicateDetector] = NearDuplicateDetector(self.storage, max_distance=6)
+    
+    @property
+    def base_url(self) -> str:
+        return self.source.base_url
+    
+    @base_url.setter
+    def base_url(self, url: str) -> None:
+        self.source.base_url = url
+    
+    def resize_connection_pool(self, pool_connections: int, pool_maxsize: int) -> None:
+        """Mount adapters that keep pool_maxsize connections open to each of pool_connections hosts."""
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
     
     def get_random_user_agent(self) -> Optional[str]:
-        """Return a random user agent from the list or None if list is empty."""
-        if not self.user_agents:
-            return None
-        return random.choice(self.user_agents)
+        """Return a random healthy user agent from the list or None if list is empty."""
+        return self.user_agent_health.choose(self.user_agents)
     
     def get_random_proxy(self) -> Optional[str]:
-        """Return a random proxy from the list or None if list is empty."""
-        if not self.proxies:
-            return None
-        return random.choice(self.proxies)
+        """Return a random healthy proxy from the list or None if list is empty."""
+        return self.proxy_health.choose(self.proxies)
     
     def get_request_headers(self) -> Dict[str, str]:
         """Generate request headers with a random user agent if available."""
@@ -92,9 +172,55 @@ class CNNCrawler:
 
         return headers
     
-    def make_request(self, url: str) -> Optional[requests.Response]:
-        """Make an HTTP request with random user agent and proxy if available."""
+    def make_request(self, url: str, extra_headers: Optional[Dict[str, str]] = None,
+                     hedge: bool = False) -> Optional[requests.Response]:
+        """Make an HTTP request with a healthy user agent and proxy, retrying failed attempts.
+        
+        Connection errors, timeouts, 429 and 5xx responses are retried up to max_attempts
+        times after a jittered exponential backoff. Each attempt's timeout follows recent
+        response times of the host and doubles on every retry. All attempts share one
+        deadline of request_deadline seconds, so a request gives up once it has run out.
+        
+        Args:
+            url: URL to fetch
+            extra_headers: Headers added to the default ones
+            hedge: Send a second request if the first is slower than usual and use the first response
+        
+        Returns:
+            The response, or None if every attempt failed
+        """
+        host = urlparse(url).netloc
+        deadline = time.monotonic() + self.request_deadline
+        error = None
+        for attempt in range(max(1, self.max_attempts)):
+            if attempt > 0:
+                delay = self.retry_delay(attempt - 1, error)
+                # No retry that could not finish before the deadline
+                if time.monotonic() + delay >= deadline:
+                    break
+                HTTP_RETRIES.inc(host=host)
+                time.sleep(delay)
+            timeout = min(self.latency_tracker.max_timeout, self.latency_tracker.timeout(host) * 2 ** attempt,
+                          deadline - time.monotonic())
+            if hedge:
+                response, error = self._make_hedged_attempt(url, extra_headers, host, timeout, deadline)
+            else:
+                response, error = self._make_attempt(url, extra_headers, host, timeout, deadline)
+            if response is not None:
+                return response
+            if not self.is_retryable(error):
+                break
+        
+        print(f"Error fetching {url}: {error}")
+        return None
+    
+    def _make_attempt(self, url: str, extra_headers: Optional[Dict[str, str]], host: str,
+                      timeout: float, deadline: float) -> Tuple[Optional[requests.Response], Optional[Exception]]:
+        """Send one request before the time.monotonic() deadline. Returns the response, or None and the error."""
         headers = self.get_request_headers()
+        if extra_headers:
+            headers.update(extra_headers)
+        user_agent = headers.get('User-Agent')
         proxy = self.get_random_proxy()
         
         proxies = None
@@ -104,189 +230,444 @@ class CNNCrawler:
                 'https': proxy
             }
         
+        # Wait for the host's token bucket instead of sleeping a fixed time, but not past the deadline
+        if not self.rate_limiter.acquire(host, timeout=max(0.0, deadline - time.monotonic())):
+            return None, requests.exceptions.Timeout(f"Rate limit of {host} held the request past its deadline")
+        timeout = min(timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            return None, requests.exceptions.Timeout(f"Request to {host} passed its deadline")
+        
+        start = time.perf_counter()
+        status = "error"
         try:
-            response = requests.get(
+            response = self.session.get(
                 url, 
                 headers=headers, 
                 proxies=proxies, 
-                timeout=30
+                timeout=(min(self.connect_timeout, timeout), timeout)
             )
+            status = str(response.status_code)
+            HTTP_RESPONSE_BYTES.observe(len(response.content), host=host)
             response.raise_for_status()
-            return response
+            elapsed = time.perf_counter() - start
+            self.latency_tracker.record(host, elapsed)
+            self.user_agent_health.record(user_agent, True, elapsed)
+            self.proxy_health.record(proxy, True, elapsed)
+            return response, None
         
         except requests.exceptions.RequestException as e:
-            print(f"Error fetching {url}: {e}")
-            return None
+            # A missing page is not the fault of the proxy or the user agent
+            if self.is_retryable(e) or status == "403":
+                self.user_agent_health.record(user_agent, False)
+                self.proxy_health.record(proxy, False)
+            return None, e
+        
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, host=host)
+            HTTP_RESPONSES.inc(host=host, status=status)
     
-    def get_article_urls_and_titles(self) -> List[Tuple[str, str]]:
-        """Extract article URLs and titles from the CNN Lite homepage."""
-        response = self.make_request(self.base_url)
-        if not response:
-            return []
+    def _make_hedged_attempt(self, url: str, extra_headers: Optional[Dict[str, str]], host: str, timeout: float,
+                             deadline: float) -> Tuple[Optional[requests.Response], Optional[Exception]]:
+        """Send a request and a second one if the first is slower than usual, return the first success."""
+        hedge_after = self.latency_tracker.latency(host, self.hedge_quantile)
+        if hedge_after is None:
+            return self._make_attempt(url, extra_headers, host, timeout, deadline)
         
-        tree = html.fromstring(response.text)
+        first = self._hedge_executor.submit(self._make_attempt, url, extra_headers, host, timeout, deadline)
+        done, _ = wait([first], timeout=hedge_after)
+        if done:
+            return first.result()
         
-        # Based on the HTML structure, articles are in <li class="card--lite"> elements
-        article_elements = tree.xpath('//li[@class="card--lite"]')
+        second = self._hedge_executor.submit(self._make_attempt, url, extra_headers, host, timeout, deadline)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                response, error = future.result()
+                if response is not None:
+                    HTTP_HEDGES.inc(host=host, winner="first" if future is first else "hedge")
+                    # The losing request gives its pooled connection back once it finishes
+                    loser = second if future is first else first
+                    loser.add_done_callback(self._close_hedge_response)
+                    return response, None
+        HTTP_HEDGES.inc(host=host, winner="none")
+        return None, error
+    
+    @staticmethod
+    def _close_hedge_response(future: Future) -> None:
+        if future.exception() is None:
+            response, _ = future.result()
+            if response is not None:
+                response.close()
+    
+    @staticmethod
+    def is_retryable(error: Optional[Exception]) -> bool:
+        """Connection errors, timeouts, 429 and 5xx responses are worth another attempt."""
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code == 429 or error.response.status_code >= 500
+        return False
+    
+    def retry_delay(self, attempt: int, error: Optional[Exception]) -> float:
+        """Seconds to wait before retrying, honoring Retry-After on a 429 response."""
+        delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+        response = getattr(error, 'response', None)
+        if response is not None and response.status_code == 429:
+            try:
+                delay = max(delay, min(self.retry_max_delay, float(response.headers.get('Retry-After', 0))))
+            except ValueError:
+                pass
+        return delay
+    
+    def make_conditional_request(self, url: str, hedge: bool = False) -> Optional[requests.Response]:
+        """Make an HTTP request that is skipped when the page has not changed.
         
-        articles = []
-        for element in article_elements:
-            # Extract the URL
-            link_elements = element.xpath('./a/@href')
-            if not link_elements:
-                continue
-            
-            relative_url = link_elements[0]
-            full_url = f"{self.base_url}{relative_url}"
-            
-            # Extract the title from inside the <a> tag
-            title_elements = element.xpath('./a/text()')
-            title = title_elements[0].strip() if title_elements else "Unknown Title"
-            
-            articles.append((full_url, title))
+        Sends If-None-Match/If-Modified-Since from the validators stored for the URL.
+        A 304 response, or a body with the same hash as last time, counts as a cache hit.
+        
+        The validators of a changed page are not stored here but kept on the response as
+        http_validators. Call save_validators once the page's content is persisted, so a
+        page that fails to parse or save is fetched in full next time.
+        
+        Returns:
+            The response if the page changed, None if it is unchanged or the request failed
+        """
+        return self.conditional_request(url, hedge)[0]
+    
+    def conditional_request(self, url: str, hedge: bool = False) -> Tuple[Optional[requests.Response], bool]:
+        """Like make_conditional_request, but tells an unchanged page apart from a failed request.
+        
+        Returns:
+            Tuple of (the response if the page changed, True if the page is unchanged)
+        """
+        if not self.use_http_cache:
+            return self.make_request(url, hedge=hedge), False
+        
+        cached = self.storage.get_http_cache(url)
+        extra_headers = {}
+        if cached:
+            if cached["etag"]:
+                extra_headers['If-None-Match'] = cached["etag"]
+            if cached["last_modified"]:
+                extra_headers['If-Modified-Since'] = cached["last_modified"]
+        
+        response = self.make_request(url, extra_headers, hedge=hedge)
+        if response is None:
+            return None, False
+        
+        if response.status_code == 304:
+            self._count_http_cache("hits")
+            return None, True
+        
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        if cached and cached["content_hash"] == content_hash:
+            self._count_http_cache("hits")
+            return None, True
+        
+        self._count_http_cache("misses")
+        response.http_validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'), content_hash)
+        return response, False
+    
+    def save_validators(self, url: str, response: Optional[requests.Response]) -> None:
+        """Store the validators of a page whose content has been persisted."""
+        validators = getattr(response, 'http_validators', None)
+        if validators is not None:
+            self.storage.save_http_cache(url, *validators)
+    
+    def _count_http_cache(self, key: str) -> None:
+        with self._http_cache_lock:
+            self.http_cache_stats[key] += 1
+    
+    def get_article_urls_and_titles(self, source: Optional[NewsSource] = None) -> List[Tuple[str, str]]:
+        """Extract article URLs and titles from the listing page of a source, CNN Lite by default.
+        
+        Returns an empty list if the listing has not changed since the last crawl.
+        """
+        return self.fetch_listing(source)[0]
+    
+    def fetch_listing(self, source: Optional[NewsSource] = None
+                      ) -> Tuple[List[Tuple[str, str]], Optional[requests.Response]]:
+        """Fetch and parse the listing page of a source.
         
-        # Reverse the list of articles so newest are last
-        articles.reverse()
+        Returns:
+            Tuple of (article URLs and titles, listing response). The validators of the response
+            are saved with save_validators once every new article of the listing is stored.
+        """
+        source = source or self.source
+        response = self.make_conditional_request(source.listing_url, hedge=self.hedge_homepage)
+        if not response:
+            return [], None
         
-        return articles
+        return source.parse_listing(response.content, response.encoding), response
     
     def title_exists_in_db(self, title: str) -> bool:
         """Check if an article with the given title already exists in the database."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        return self.storage.title_exists(title)
+    
+    def filter_new_articles(self, article_data: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Drop the homepage cards whose title already exists in the database, resolved in one batch."""
+        existing_titles = self.storage.existing_titles(title for _, title in article_data)
+        new_articles = []
+        for url, title in article_data:
+            if title in existing_titles or self.card_given_up(url):
+                continue
+            print(title)
+            new_articles.append((url, title))
+        return new_articles
+    
+    def retitle_article(self, url: str, title: str) -> bool:
+        """Handle a new card whose article page did not change: the stored article takes the card's title.
+        
+        Returns:
+            True if the article is stored and was retitled, False if it has to be fetched again
+        """
+        if self.storage.update_title(url, title):
+            print(f"Article retitled: {title}")
+            return True
+        # Validators without a stored article, the page is fetched in full next time
+        self.storage.delete_http_cache(url)
+        return False
+    
+    def fetch_card(self, url: str, title: str,
+                   source: Optional[NewsSource] = None) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Fetch and parse the article of a new listing card.
         
-        cursor.execute("SELECT COUNT(*) FROM articles WHERE title = ?", (title,))
-        count = cursor.fetchone()[0]
+        Returns:
+            Tuple of (the parsed article if its page changed, True if the page is
+            unchanged and the stored article was retitled instead)
+        """
+        response, unchanged = self.conditional_request(url)
+        if unchanged:
+            return None, self.retitle_article(url, title)
+        if not response:
+            return None, False
+        return self.parse_article_response(response, url, title, source), False
+    
+    def card_given_up(self, url: str) -> bool:
+        with self._card_failures_lock:
+            return self._card_failures.get(url, 0) >= self.max_card_attempts
+    
+    def settle_cards(self, cards: List[Tuple[str, str]], handled: Set[str]) -> int:
+        """Record which new cards of a listing were saved or retitled in this run.
         
-        conn.close()
+        A card that fails max_card_attempts runs in a row is given up and left out of
+        later runs.
         
-        return count > 0
+        Returns:
+            Number of cards to retry, the listing's validators are saved only when there are none
+        """
+        retry = 0
+        with self._card_failures_lock:
+            for url, title in cards:
+                if url in handled:
+                    self._card_failures.pop(url, None)
+                    continue
+                failures = self._card_failures[url] = self._card_failures.get(url, 0) + 1
+                if failures >= self.max_card_attempts:
+                    print(f"Giving up on {title} after {failures} failed runs")
+                else:
+                    retry += 1
+        return retry
     
-    def parse_article(self, url: str, title: str) -> Optional[Dict[str, Any]]:
-        """Parse an article page to extract title, time, and content."""
-        response = self.make_request(url)
+    def parse_article(self, url: str, title: str, source: Optional[NewsSource] = None) -> Optional[Dict[str, Any]]:
+        """Parse an article page to extract title, time, and content.
+        
+        Returns None if the request failed or the page has not changed since it was last parsed.
+        """
+        response = self.make_conditional_request(url)
         if not response:
             return None
         
-        tree = html.fromstring(response.text)
-        
+        return self.parse_article_response(response, url, title, source)
+    
+    def parse_article_response(self, response: requests.Response, url: str, title: str,
+                               source: Optional[NewsSource] = None) -> Optional[Dict[str, Any]]:
+        """Extract title, time, and content from a fetched article page, tagged with the name of its source."""
+        source = source or self.source
         try:
-            # Extract time - CNN Lite uses p.timestamp--lite for time
-            article_time = None
-            time_elements = tree.xpath('//p[@class="timestamp--lite"]')
-            if time_elements:
-                time_text = time_elements[0].text_content().strip()
-                # Extract time from format like "Updated: 5:39 PM EST, Mon March 3, 2025"
-                try:
-                    # Remove "Updated:" and parse the rest
-                    time_str = time_text.replace("Updated:", "").strip()
-                    # Parse into datetime object
-                    article_time = parse_time_to_utc(time_str)
-                    article_time = convert_utc_to_eastern(article_time)
-                except Exception as e:
-                    print(f"Error parsing time {time_text}: {e}")
-            
-            # Extract content paragraphs - CNN Lite uses p.paragraph--lite for content
-            content_paragraphs = []
-            
-            # First try the specific CNN Lite paragraph class
-            paragraphs = tree.xpath('//p[@class="paragraph--lite"]')
-            for p in paragraphs:
-                # Get all text including text from child elements like <em> or <a>
-                if p.text_content():
-                    content_paragraphs.append(p.text_content().strip())
-            
-            # Join paragraphs with spaces
-            content = '\n'.join([p for p in content_paragraphs if p])
-            
-            return {
-                "title": title,
-                "url": url,
-                "time": article_time,
-                "content": content
-            }
+            with PARSE_SECONDS.time(source=source.name):
+                article = source.parse_article(response.content, url, title, response.encoding)
         except Exception as e:
             print(f"Error parsing article {url}: {e}")
             return None
+        article["source"] = source.name
+        article["http_validators"] = getattr(response, 'http_validators', None)
+        return article
     
     def save_article_to_db(self, article: Dict[str, Any]) -> None:
         """Save an article to the SQLite database."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Convert datetime to string if it's a datetime object
-        article_time = article["time"]
-        if isinstance(article_time, datetime):
-            article_time = article_time.isoformat()
-        
-        try:
-            cursor.execute(
-                "INSERT INTO articles (title, url, time, content) VALUES (?, ?, ?, ?)",
-                (article["title"], article["url"], article_time, article["content"])
-            )
-            conn.commit()
+        if self.storage.save_article(article):
             print(f"Article saved: {article['title']}")
-        except sqlite3.IntegrityError as e:
-            # URL already exists, update the other fields
-            cursor.execute(
-                "UPDATE articles SET title = ?, time = ?, content = ? WHERE url = ?",
-                (article["title"], article_time, article["content"], article["url"])
-            )
-            conn.commit()
+        else:
             print(f"Article updated: {article['title']}")
-        finally:
-            conn.close()
     
-    def crawl(self) -> int:
-        """Crawl CNN Lite website and save articles to SQLite database."""
-        print("Starting CNN Lite crawler...")
+    def save_articles_to_db(self, articles: List[Dict[str, Any]]) -> int:
+        """Save a batch of articles to the SQLite database in one transaction.
         
-        # Get article URLs and titles from homepage
-        article_data = self.get_article_urls_and_titles()
-        print(f"Found {len(article_data)} articles to crawl")
+        Articles are fingerprinted first, and near-duplicates of stored articles are
+        marked with "duplicate_of" and "diff_size" so they can skip analysis.
         
-        # Parse each article
-        articles_saved = 0
-        for i, (url, title) in enumerate(article_data):            
-            # Skip if title already exists in database
-            if self.title_exists_in_db(title):
+        Returns:
+            Number of articles saved (inserted or updated)
+        """
+        if not articles:
+            return 0
+        duplicates = 0
+        with self._save_lock:
+            if self.near_duplicates is not None:
+                duplicates = self.near_duplicates.mark(articles)
+                for article in articles:
+                    if article.get("duplicate_of"):
+                        NEAR_DUPLICATE_DIFF_WORDS.observe(article["diff_size"])
+            inserted, updated = self.storage.save_articles(articles)
+        # The pages are unchanged from now on, until then they are fetched in full
+        self.storage.save_http_caches([
+            (article["url"], *article["http_validators"]) for article in articles if article.get("http_validators")
+        ])
+        print(f"Articles saved: {inserted} inserted, {updated} updated, {duplicates} near-duplicates")
+        return len(articles)
+    
+    def skip_analyzed_duplicates(self, articles: List[Dict[str, Any]],
+                                 analyzing: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Drop near-duplicates of articles that were analyzed, or that are analyzed along with them.
+        
+        An article is dropped only if it is within the near-duplicate distance of the
+        content that was analyzed, not just of the version stored last. A minor update
+        has its own URL as duplicate_of. Once its edits add up to more than that distance,
+        the mark of the URL is removed and the article is analyzed again. A near-duplicate
+        of an article that was never analyzed, like an off-topic one or one whose analysis
+        failed, is kept.
+        
+        Args:
+            articles: Saved articles, with duplicate_of set by near-duplicate detection
+            analyzing: URLs already sent for analysis that have not been marked yet
+        
+        Returns:
+            The articles to analyze, in their original order
+        """
+        analyzed = self.storage.analyzed_fingerprints(
+            article["duplicate_of"] for article in articles if article.get("duplicate_of")
+        )
+        max_distance = self.near_duplicates.max_distance if self.near_duplicates is not None else 0
+        queued = set(analyzing or ())
+        queued.update(article["url"] for article in articles if not article.get("duplicate_of"))
+        
+        distinct_articles = []
+        drifted = []
+        for article in articles:
+            original = article.get("duplicate_of")
+            if original is None:
+                distinct_articles.append(article)
                 continue
-            print(title)
-            article_item = self.parse_article(url, title)
-            if article_item:
-                self.save_article_to_db(article_item)
-                articles_saved += 1
-            
-            # Add a small delay to avoid overloading the server
-            time.sleep(random.uniform(1, 3))
+            if original in queued and original != article["url"]:
+                continue
+            fingerprint = analyzed.get(original)
+            if (fingerprint is not None and article.get("simhash") is not None
+                    and hamming_distance(fingerprint, article["simhash"]) <= max_distance):
+                continue
+            if original == article["url"] and original in analyzed:
+                drifted.append(original)
+            distinct_articles.append(article)
+        self.storage.unmark_analyzed(drifted)
+        return distinct_articles
+    
+    def crawl(self, max_in_flight: Optional[int] = None) -> int:
+        """Crawl CNN Lite website and save articles to SQLite database.
         
-        return articles_saved
+        Articles are fetched and parsed by a bounded pool of worker threads, while
+        the per-host rate limiter keeps the request rate polite.
+        
+        Args:
+            max_in_flight: Maximum number of concurrent article requests. If None, uses self.max_in_flight.
+        
+        Returns:
+            Number of articles saved
+        """
+        self.last_crawl_stats = self.crawl_source(self.source, max_in_flight)
+        return self.last_crawl_stats["saved"]
     
-    def get_articles_by_number(self, number: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Retrieve articles from the database ordered by time.
+    def crawl_source(self, source: NewsSource, max_in_flight: Optional[int] = None) -> Dict[str, Any]:
+        """Crawl one source and save its new articles to the SQLite database.
         
         Args:
-            number: Maximum number of articles to return. If None, returns all articles.
+            source: Source whose listing and articles are crawled
+            max_in_flight: Maximum number of concurrent article requests. If None, uses the
+                source's max_in_flight, or self.max_in_flight if the source has none.
         
         Returns:
-            List of article dictionaries ordered by time (newest first).
+            Stats of the crawl, with the number of articles saved under "saved"
         """
-        conn = sqlite3.connect(self.db_file)
-        conn.row_factory = sqlite3.Row  # This enables column access by name
-        cursor = conn.cursor()
+        print(f"Starting {source.name} crawler...")
+        start_time = time.perf_counter()
+        
+        # Get article URLs and titles from the listing page
+        article_data, listing = self.fetch_listing(source)
+        print(f"Found {len(article_data)} {source.name} articles to crawl")
         
-        query = "SELECT title, time, content FROM articles ORDER BY time DESC"
+        # Skip if title already exists in database
+        new_articles = self.filter_new_articles(article_data)
         
-        if number is not None and isinstance(number, int) and number > 0:
-            query += f" LIMIT {number}"
+        # Fetch and parse articles concurrently, save them in listing order
+        workers = max(1, max_in_flight or source.max_in_flight or self.max_in_flight)
+        articles_saved = 0
+        articles_retitled = 0
+        handled: Set[str] = set()
+        pending: List[Dict[str, Any]] = []
         
-        cursor.execute(query)
+        def save_pending() -> int:
+            saved = self.save_articles_to_db(pending)
+            handled.update(article["url"] for article in pending)
+            pending.clear()
+            return saved
         
-        articles = [dict(row) for row in cursor.fetchall()]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.fetch_card, url, title, source) for url, title in new_articles]
+            for (url, _), future in zip(new_articles, futures):
+                article_item, retitled = future.result()
+                if article_item:
+                    pending.append(article_item)
+                elif retitled:
+                    handled.add(url)
+                    articles_retitled += 1
+                # Write in batches so articles reach the database while the crawl continues
+                if len(pending) >= self.save_batch_size:
+                    articles_saved += save_pending()
+        articles_saved += save_pending()
         
-        conn.close()
+        # Until every new card is saved, retitled or given up, the listing is fetched in full and the rest are retried
+        if self.settle_cards(new_articles, handled) == 0:
+            self.save_validators(source.listing_url, listing)
         
-        return articles
+        elapsed = time.perf_counter() - start_time
+        stats = {
+            "source": source.name,
+            "found": len(article_data),
+            "fetched": len(new_articles),
+            "saved": articles_saved,
+            "retitled": articles_retitled,
+            "max_in_flight": workers,
+            "seconds": elapsed,
+            "articles_per_second": len(new_articles) / elapsed if elapsed > 0 else 0.0,
+            "http_cache_hits": self.http_cache_stats["hits"],
+            "http_cache_misses": self.http_cache_stats["misses"],
+        }
+        print(f"Crawled {len(new_articles)} {source.name} articles in {elapsed:.2f}s "
+              f"({stats['articles_per_second']:.2f} articles/s, {workers} in flight)")
+        
+        return stats
+    
+    def get_articles_by_number(self, number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Retrieve articles from the database ordered by time.
+        
+        Args:
+            number: Maximum number of articles to return. If None, returns all articles.
+        
+        Returns:
+            List of article dictionaries ordered by time (newest first).
+        """
+        return self.storage.get_articles_by_number(number)
     
     def get_articles_by_time(self, cutoff_time: datetime) -> List[Dict[str, Any]]:
         """Retrieve articles from the database after the specified time.
@@ -297,36 +678,44 @@ class CNNCrawler:
         Returns:
             List of article dictionaries published after the specified time, ordered by time (newest first).
         """
-        conn = sqlite3.connect(self.db_file)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
-        cursor = conn.cursor()
-        
-        query = "SELECT title, time, content FROM articles WHERE time > ? ORDER BY time DESC"
-        cursor.execute(query, (cutoff_time,))
-        
-        articles = [dict(row) for row in cursor.fetchall()]
+        return self.storage.get_articles_by_time(cutoff_time)
+    
+    def iter_articles_by_number(self, number: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Stream articles ordered by time (newest first) without loading them all into memory.
         
-        conn.close()
+        Args:
+            number: Maximum number of articles to return. If None, returns all articles.
+        """
+        return self.storage.iter_articles_by_number(number)
+    
+    def iter_articles_by_time(self, cutoff_time: datetime) -> Iterator[Dict[str, Any]]:
+        """Stream articles published after the cutoff time (newest first) without loading them all into memory.
         
-        return articles
-
-class GeminiAnalyzer:
-    def __init__(self):
-        self.gemini_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        Args:
+            cutoff_time: Datetime object specifying the cutoff time, naive datetimes are local time
+        """
+        return self.storage.iter_articles_by_time(cutoff_time)
 
-    def analyze(self, articles: List[Dict[str, Any]]) -> str:
-        """Analyze article content using Google's Gemini AI.
+    def search_articles(self, query: str, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Search the archive with an FTS5 keyword query, best matches first.
         
         Args:
-            articles: List of article dictionaries containing title and content
+            query: FTS5 query, e.g. 'tariffs AND "treasury yield"'
+            limit: Maximum number of articles to return. If None, returns all matches.
             
         Returns:
-            Analysis text from Gemini
+            List of article dictionaries
         """
-        
-        try:
-            # Prepare the prompt
-            prompt = f"""
+        return self.storage.search_articles(query, limit)
+    
+    def get_articles_by_topic(self, topic: str, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Search the archive for one of the topics in TOPIC_QUERIES."""
+        if topic not in self.TOPIC_QUERIES:
+            raise ValueError(f"Unknown topic {topic}, expected one of {', '.join(self.TOPIC_QUERIES)}")
+        return self.search_articles(self.TOPIC_QUERIES[topic], limit)
+
+class GeminiAnalyzer:
+    PROMPT_TEMPLATE = """
             Read the news articles and analyze them.
             If there are articles that are related to president's policies, US policies, US foreign policies, wars, economics, banks, stock market, big companies like Apple, Google, Amazon, Microsoft, Nvidia, Tesla, Microsoft, or any other topics that are related to those, please give a summary of the article.
             For those articles, if they are related to US bonds or treasury yield, tell me if the bond price and the treasury yield of short term, medium term, and long term are going up or down based on the articles.
@@ -340,22 +729,220 @@ class GeminiAnalyzer:
             
             用中文回答
             """
+
+    # Merges the analyses of several batches into one digest
+    REDUCE_PROMPT_TEMPLATE = """
+            The following are analyses of batches of news articles from the same period, separated by ---.
+            Merge them into one digest. Keep every summary with its published time, combine the summaries of the same story, and order them from newest to oldest.
+            Combine what the analyses say about the bond prices and treasury yields of short term, medium term, and long term, the stock market, and the US dollar index into one conclusion for each, and point out where the analyses disagree.
+
+            Analyses:
+            
+            {analyses}
+            
+            用中文回答
+            """
+
+    def __init__(self, storage: Optional[NewsStorage] = None):
+        # The genai client is created on first use, google.genai is slow to import
+        self._gemini_client = None
+        self._gemini_client_lock = td.Lock()
+        self.model = "gemini-2.0-flash"
+        
+        # Persistent analysis cache, disabled when no storage is given
+        self.storage = storage
+        self.cache_ttl: Optional[float] = 7 * 24 * 3600
+        self.cache_max_entries: Optional[int] = 5000
+        self.cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+        self._cache_stats_lock = td.Lock()
+        
+        # Estimated prompt tokens per analysis call, and an upper bound on articles per call
+        self.batch_token_budget = 8000
+        self.batch_max_articles = 20
+
+    @property
+    def gemini_client(self):
+        with self._gemini_client_lock:
+            if self._gemini_client is None:
+                from google import genai
+                self._gemini_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+            return self._gemini_client
+
+    @gemini_client.setter
+    def gemini_client(self, client) -> None:
+        self._gemini_client = client
+
+    def serialize_articles(self, articles: List[Dict[str, Any]]) -> str:
+        """Serialize articles compactly for the prompt, one block per article."""
+        blocks = []
+        for article in articles:
+            lines = [article.get("title") or ""]
+            if article.get("time"):
+                lines.append(str(article["time"]))
+            if article.get("content"):
+                lines.append(article["content"])
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
+
+    def build_prompt(self, articles: List[Dict[str, Any]]) -> str:
+        """Build the Gemini prompt for a list of articles."""
+        return self.PROMPT_TEMPLATE.format(articles=self.serialize_articles(articles))
+
+    def estimate_tokens(self, text: str) -> int:
+        """Rough token count of a text, about four characters per token."""
+        return len(text) // 4 + 1
+
+    def make_batches(self, articles: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Pack articles in order into batches that fit the token budget.
+        
+        An article that is larger than the budget on its own gets a batch to itself,
+        with its content truncated to fit.
+        
+        Args:
+            articles: List of article dictionaries
+            
+        Returns:
+            List of article batches
+        """
+        budget = self.batch_token_budget - self.estimate_tokens(self.PROMPT_TEMPLATE)
+        batches: List[List[Dict[str, Any]]] = []
+        batch: List[Dict[str, Any]] = []
+        batch_tokens = 0
+        for article in articles:
+            tokens = self.estimate_tokens(self.serialize_articles([article]))
+            if tokens > budget:
+                overflow_chars = (tokens - budget) * 4
+                article = dict(article, content=(article.get("content") or "")[:-overflow_chars])
+                tokens = budget
+            if batch and (batch_tokens + tokens > budget or len(batch) >= self.batch_max_articles):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(article)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def cache_key(self, prompt: str) -> str:
+        """Content hash of an analysis request: the model and the full prompt."""
+        return hashlib.sha256(f"{self.model}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def analyze(self, articles: List[Dict[str, Any]]) -> str:
+        """Analyze article content using Google's Gemini AI.
+        
+        The same articles sent to the same model with the same prompt are answered
+        from the analysis cache without calling the API. Articles that were analyzed
+        are marked in the storage, so their near-duplicates can skip analysis.
+        
+        Args:
+            articles: List of article dictionaries containing title and content
+            
+        Returns:
+            Analysis text from Gemini
+        """
+        
+        try:
+            analysis = self.generate(self.build_prompt(articles))
+        except Exception as e:
+            return f"Error analyzing with Gemini: {str(e)}"
+        if self.storage is not None:
+            self.storage.mark_analyzed(articles)
+        return analysis
+    
+    def build_reduce_prompt(self, analyses: List[str]) -> str:
+        """Build the Gemini prompt that merges partial analyses."""
+        return self.REDUCE_PROMPT_TEMPLATE.format(analyses="\n\n---\n\n".join(analyses))
+    
+    def generate(self, prompt: str) -> str:
+        """Answer a prompt through the analysis cache, calling Gemini on a miss.
+        
+        Raises:
+            Exception: If the Gemini call fails or returns no text
+        """
+        start = time.perf_counter()
+        result = "error"
+        try:
+            ANALYSIS_PROMPT_CHARS.observe(len(prompt))
+            
+            key = self.cache_key(prompt)
+            if self.storage is not None:
+                analysis = self.storage.get_analysis(key, self.cache_ttl)
+                with self._cache_stats_lock:
+                    self.cache_stats["hits" if analysis is not None else "misses"] += 1
+                if analysis is not None:
+                    result = "cached"
+                    return analysis
             
             # Generate the response
             response = self.gemini_client.models.generate_content(
-                model="gemini-2.0-flash", contents=prompt
+                model=self.model, contents=prompt
             )
+            if not response.text:
+                raise ValueError("Gemini returned no text")
             
+            if self.storage is not None:
+                self.storage.save_analysis(key, self.model, response.text)
+                self.storage.evict_analyses(self.cache_ttl, self.cache_max_entries)
+            
+            result = "generated"
             return response.text
         
-        except Exception as e:
-            return f"Error analyzing with Gemini: {str(e)}"
+        finally:
+            ANALYSIS_SECONDS.observe(time.perf_counter() - start, result=result)
+            ANALYSES.inc(result=result)
 
 class NewsProcessor:
     def __init__(self):
-        self.cnn_crawler = CNNCrawler()
-        self.gemini_analyzer = GeminiAnalyzer()
-        self.discord_client = BackgroundDiscordClient(os.getenv('DISCORD_TOKEN'))
+        # The crawler and the processor share one storage layer
+        self.storage = NewsStorage()
+        self.cnn_crawler = CNNCrawler(self.storage)
+        
+        # Sources crawled by news_task, each with its own limits, CNN Lite to begin with
+        self.crawl_engine = CrawlEngine(self.cnn_crawler)
+        self.gemini_analyzer = GeminiAnalyzer(self.storage)
+        
+        # The Discord client logs in on first use, messages wait in its queue until it is ready
+        self._discord_client = None
+        self._discord_client_lock = td.Lock()
+        
+        # Maximum number of Gemini calls running at once
+        self.max_concurrent_analyses = 3
+        
+        # Drops clearly off-topic articles before they are sent to Gemini
+        self.relevance_filter: Optional[RelevanceFilter] = RelevanceFilter()
+        
+        # Merges the analyses of a time window into one digest, reusing stored map results
+        self.digest_builder = DigestBuilder(
+            self.gemini_analyzer, self.storage, max_concurrent_analyses=self.max_concurrent_analyses
+        )
+        
+        # Runs news_task, created by start()
+        self.scheduler: Optional[AdaptiveScheduler] = None
+        
+        # Records a trace of the stages of every news_task run when TRACE_RUNS is set
+        self.tracer = Tracer(enabled=os.getenv('TRACE_RUNS', '').lower() in ('1', 'true', 'yes'))
+        
+        # Serves /metrics on METRICS_PORT and dumps JSON to METRICS_FILE, created by start()
+        self.metrics_exporter: Optional[MetricsExporter] = None
+
+    @property
+    def discord_client(self):
+        with self._discord_client_lock:
+            if self._discord_client is None:
+                from discord_client import BackgroundDiscordClient
+                self._discord_client = BackgroundDiscordClient(os.getenv('DISCORD_TOKEN'))
+            return self._discord_client
+
+    @discord_client.setter
+    def discord_client(self, client) -> None:
+        self._discord_client = client
+
+    def deliver_analysis(self, analysis: str, heading: str = "Hourly message") -> None:
+        """Send an analysis to the Discord channel."""
+        now = datetime.now()
+        time_info = f"{heading} sent at {now.strftime('%H:%M:%S')}\n\n"
+        # Delivery is queued, so the next analysis does not wait for Discord
+        self.discord_client.send_message(int(os.getenv('DISCORD_CHANNEL')), time_info + analysis)
 
     def process_articles(self, articles: List[Dict[str, Any]]):
         """Process the articles with Gemini analysis and send to Discord.
@@ -373,21 +960,75 @@ class NewsProcessor:
         
         print(f"Retrieved {len(articles)} articles for analysis")
         
-        # Analyze articles in batches of 5
-        for i in range(0, len(articles), 5):
-            analysis = self.gemini_analyzer.analyze(articles[i:i+5])
+        articles = self.select_articles(articles)
+        if not articles:
+            return 0
+        
+        # Analyze batches packed by token budget, several at once, and send them in order
+        batches = self.gemini_analyzer.make_batches(articles)
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrent_analyses)) as executor:
+            for batch, analysis in zip(batches, executor.map(self.gemini_analyzer.analyze, batches)):
+                self.deliver_analysis(analysis)
+                print(f"Processed {len(batch)} articles")
         
-            # Send to Discord
-            now = datetime.now()
-            time_info = f"Hourly message sent at {now.strftime('%H:%M:%S')}\n\n"
-            self.discord_client.send_message_sync(int(os.getenv('DISCORD_CHANNEL')), time_info + analysis)
-            print(f"Processed {len(articles[i:i+5])} articles")
+        return len(articles)
     
-    def process_articles_by_time(self, hours: int = 1):
+    def select_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop off-topic articles and near-duplicates of other stored articles from a window.
+        
+        A window is processed on demand, so its articles are kept whether or not they
+        were analyzed before, including minor updates of the same URL.
+        """
+        if self.relevance_filter is not None:
+            relevant_articles = self.relevance_filter.filter(articles)
+            print(f"Skipped {len(articles) - len(relevant_articles)} off-topic articles")
+            articles = relevant_articles
+        
+        distinct_articles = [
+            article for article in articles
+            if not article.get("duplicate_of") or article["duplicate_of"] == article.get("url")
+        ]
+        if len(distinct_articles) < len(articles):
+            print(f"Skipped {len(articles) - len(distinct_articles)} near-duplicate articles")
+        return distinct_articles
+    
+    def process_digest(self, articles: List[Dict[str, Any]]):
+        """Merge the analyses of the articles into one digest and send it to Discord.
+        
+        Args:
+            articles: List of article dictionaries
+            
+        Returns:
+            Number of articles in the digest
+        """
+        
+        if not articles:
+            print("No article to process")
+            return 0
+        
+        print(f"Retrieved {len(articles)} articles for a digest")
+        
+        articles = self.select_articles(articles)
+        if not articles:
+            return 0
+        
+        try:
+            digest = self.digest_builder.build(articles)
+        except Exception as e:
+            digest = f"Error building digest with Gemini: {str(e)}"
+        if digest is None:
+            print("No digest to send")
+            return 0
+        self.deliver_analysis(digest, heading="Digest")
+        
+        return len(articles)
+    
+    def process_articles_by_time(self, hours: int = 1, map_reduce: bool = False):
         """Process the latest articles with Gemini analysis and send to Discord.
         
         Args:
             hours: Number of hours to process
+            map_reduce: If True, send one digest of the whole window instead of one analysis per batch
             
         Returns:
             Number of articles successfully processed
@@ -399,7 +1040,9 @@ class NewsProcessor:
         # Get the latest articles
         cutoff_time = datetime.now() - timedelta(hours=hours)
         articles = self.cnn_crawler.get_articles_by_time(cutoff_time)
-        self.process_articles(articles)
+        if map_reduce:
+            return self.process_digest(articles)
+        return self.process_articles(articles)
     
     def process_articles_by_number(self, number: int = 10):
         if number <= 0:
@@ -408,19 +1051,34 @@ class NewsProcessor:
         articles = self.cnn_crawler.get_articles_by_number(number)
         self.process_articles(articles)
 
-    def news_task(self):
-        # Crawl CNN Lite website and save articles to SQLite database
-        articles_saved = self.cnn_crawler.crawl()
+    def news_task(self) -> int:
+        """Crawl every registered source, save new articles and stream them through analysis to Discord.
+        
+        Returns:
+            Number of articles saved or retitled, which the scheduler uses to adapt the poll interval
+        """
+        pipeline = NewsPipeline(
+            self.cnn_crawler, self.gemini_analyzer, self.deliver_analysis,
+            max_concurrent_analyses=self.max_concurrent_analyses, relevance_filter=self.relevance_filter,
+            tracer=self.tracer, engine=self.crawl_engine
+        )
+        articles_saved = pipeline.run()
         print(f"Articles saved: {articles_saved}")
-
-        # Process the latest articles and send to Discord
-        self.process_articles_by_number(articles_saved)
-
-        # Start a new timer
-        td.Timer(3600, self.news_task).start()
+        return articles_saved + pipeline.last_run_stats.get("retitled", 0)
     
     def start(self):
-        self.news_task()
+        metrics_port = os.getenv('METRICS_PORT')
+        metrics_file = os.getenv('METRICS_FILE')
+        if metrics_port or metrics_file:
+            self.metrics_exporter = MetricsExporter(
+                METRICS, self.tracer, port=int(metrics_port) if metrics_port else None,
+                dump_file=metrics_file, dump_interval=float(os.getenv('METRICS_DUMP_INTERVAL', '60'))
+            )
+            self.metrics_exporter.start()
+        
+        # Fixed-rate ticks with overlap protection, faster while the homepage keeps changing
+        self.scheduler = AdaptiveScheduler(self.news_task, interval=3600, min_interval=900, max_interval=7200)
+        self.scheduler.start()
 
 if __name__ == "__main__":
     processor = NewsProcessor()
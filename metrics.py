@@ -0,0 +1,346 @@
+import http.server
+import json
+import os
+import threading as td
+import time
+from collections import deque
+from contextlib import ContextDecorator, contextmanager
+from datetime import datetime
+from typing import List, Dict, Optional, Any, Tuple, Iterator, Sequence
+
+# Upper bounds in seconds for latency histograms
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Upper bounds in bytes or characters for size histograms
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name: str, description: str):
+        """A value per label set that only goes up, like requests by status."""
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = td.Lock()
+
+    def inc(self, value: float = 1, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"labels": dict(key), "value": value} for key, value in sorted(self._values.items())]
+
+class _HistogramTimer(ContextDecorator):
+    def __init__(self, histogram: "Histogram", labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def _recreate_cm(self) -> "_HistogramTimer":
+        # A decorated function gets a new timer per call, so concurrent calls keep their own start time
+        return _HistogramTimer(self.histogram, self.labels)
+
+    def __enter__(self) -> "_HistogramTimer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.histogram.observe(time.perf_counter() - self._start, **self.labels)
+        return False
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        """Counts of observations per bucket, plus their sum, per label set."""
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # label set -> [bucket counts..., count of observations above the last bucket], sum
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = td.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def time(self, **labels: Any) -> _HistogramTimer:
+        """Observe the seconds spent in a with block or a decorated function."""
+        return _HistogramTimer(self, labels)
+
+    def quantile(self, q: float, counts: List[int]) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+        count = sum(counts)
+        if count == 0:
+            return None
+        rank = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                cumulative += counts[-1]
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total[0]:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            series = [(key, list(counts), total[0]) for key, (counts, total) in sorted(self._series.items())]
+        result = []
+        for key, counts, total in series:
+            count = sum(counts)
+            result.append({
+                "labels": dict(key),
+                "count": count,
+                "sum": total,
+                "mean": total / count if count else None,
+                "p50": self.quantile(0.5, counts),
+                "p95": self.quantile(0.95, counts),
+                "p99": self.quantile(0.99, counts),
+            })
+        return result
+
+class MetricsRegistry:
+    def __init__(self):
+        """The metrics of the process, by name."""
+        self._metrics: Dict[str, Any] = {}
+        self._lock = td.Lock()
+
+    def counter(self, name: str, description: str) -> Counter:
+        """Return the counter with this name, creating it on first use."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, description)
+            return self._metrics[name]
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Return the histogram with this name, creating it on first use."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, description, buckets)
+            return self._metrics[name]
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return every metric as plain data, with mean and estimated quantiles for histograms."""
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metric.to_dict() for name, metric in sorted(metrics.items())}
+
+# Metrics of this process, shared by every module
+METRICS = MetricsRegistry()
+
+class Trace:
+    def __init__(self, name: str, enabled: bool = True):
+        """Timed spans of one run, like one news_task. A disabled trace records nothing."""
+        self.name = name
+        self.enabled = enabled
+        self.started = datetime.now()
+        self.attributes: Dict[str, Any] = {}
+        self.spans: List[Dict[str, Any]] = []
+        self.seconds: Optional[float] = None
+        self._start = time.perf_counter()
+        self._lock = td.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        """Record the time spent in a with block as a span of this trace."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.spans.append({
+                    "name": name,
+                    "start": start - self._start,
+                    "seconds": end - start,
+                    "thread": td.current_thread().name,
+                    "attributes": attributes,
+                })
+
+    def finish(self, **attributes: Any) -> None:
+        self.seconds = time.perf_counter() - self._start
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        return {
+            "name": self.name,
+            "started": self.started.isoformat(),
+            "seconds": self.seconds,
+            "attributes": self.attributes,
+            "spans": spans,
+        }
+
+class Tracer:
+    def __init__(self, enabled: bool = False, keep: int = 24):
+        """Start traces and keep the most recent finished ones.
+
+        Args:
+            enabled: If False, traces record nothing
+            keep: Number of finished traces to keep
+        """
+        self.enabled = enabled
+        self.traces: deque = deque(maxlen=keep)
+        self._lock = td.Lock()
+
+    def start_trace(self, name: str) -> Trace:
+        return Trace(name, self.enabled)
+
+    def finish_trace(self, trace: Trace, **attributes: Any) -> None:
+        trace.finish(**attributes)
+        if trace.enabled:
+            with self._lock:
+                self.traces.append(trace)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self.traces)
+        return [trace.to_dict() for trace in traces]
+
+class MetricsExporter:
+    def __init__(self, registry: MetricsRegistry = METRICS, tracer: Optional[Tracer] = None,
+                 port: Optional[int] = None, dump_file: Optional[str] = None, dump_interval: float = 60):
+        """Export metrics through an HTTP endpoint, a periodic JSON dump, or both.
+
+        The endpoint serves the Prometheus text format on /metrics and the JSON
+        document, with the recent traces, on /metrics.json.
+
+        Args:
+            registry: Metrics to export
+            tracer: Tracer whose recent traces are included in the JSON document
+            port: Port of the HTTP endpoint, or None for no endpoint
+            dump_file: File the JSON document is written to, or None for no dump
+            dump_interval: Seconds between dumps
+        """
+        self.registry = registry
+        self.tracer = tracer
+        self.port = port
+        self.dump_file = dump_file
+        self.dump_interval = dump_interval
+
+        self._server: Optional[http.server.ThreadingHTTPServer] = None
+        self._stop_event = td.Event()
+        self._dump_thread: Optional[td.Thread] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "time": datetime.now().isoformat(),
+            "metrics": self.registry.to_dict(),
+            "traces": self.tracer.to_list() if self.tracer is not None else [],
+        }
+
+    def dump(self) -> None:
+        """Write the JSON document, replacing the previous dump at once."""
+        temp_file = f"{self.dump_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        os.replace(temp_file, self.dump_file)
+
+    def _dump_loop(self) -> None:
+        while not self._stop_event.wait(self.dump_interval):
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"Error writing metrics to {self.dump_file}: {e}")
+
+    def _make_handler(self):
+        exporter = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = exporter.registry.render_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(exporter.to_dict(), default=str).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        if self.port is not None:
+            self._server = http.server.ThreadingHTTPServer(("", self.port), self._make_handler())
+            self._server.daemon_threads = True
+            td.Thread(target=self._server.serve_forever, daemon=True).start()
+            print(f"Serving metrics on port {self._server.server_port}")
+        if self.dump_file:
+            self._dump_thread = td.Thread(target=self._dump_loop, daemon=True)
+            self._dump_thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._dump_thread is not None:
+            self._dump_thread.join()
+            self._dump_thread = None
+        if self.dump_file:
+            self.dump()
@@ -0,0 +1,121 @@
+import difflib
+import hashlib
+import re
+from typing import List, Dict, Optional, Any, Tuple
+
+# Fingerprints are 64-bit SimHashes, indexed as SIMHASH_BANDS bands of SIMHASH_BAND_BITS bits.
+# Two fingerprints within distance d < SIMHASH_BANDS share at least one band exactly,
+# so a lookup only has to compare the articles that share a band.
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8
+SIMHASH_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+SIMHASH_BAND_MASK = (1 << SIMHASH_BAND_BITS) - 1
+
+# Words per shingle, and the fewest words a text needs to be fingerprinted
+SHINGLE_SIZE = 3
+MIN_WORDS = 20
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Byte translation tables that map a byte to 1 if the bit is set and 0 otherwise
+BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+def words(text: Optional[str]) -> List[str]:
+    return WORD_PATTERN.findall((text or "").lower())
+
+def simhash(text: Optional[str]) -> Optional[int]:
+    """64-bit SimHash of the word shingles of text, or None if the text is too short to compare."""
+    tokens = words(text)
+    if len(tokens) < MIN_WORDS:
+        return None
+
+    shingles = set(zip(*(tokens[i:] for i in range(SHINGLE_SIZE))))
+    digests = b"".join(
+        hashlib.blake2b(" ".join(shingle).encode("utf-8"), digest_size=8).digest() for shingle in shingles
+    )
+    # A bit is set when more than half of the shingle hashes have it set. Bits are
+    # counted over the same byte of every hash at once with bytes.translate, which
+    # is much faster than testing 64 bits of every hash in Python.
+    threshold = len(shingles) / 2
+    fingerprint = 0
+    for position in range(8):
+        column = digests[position::8]
+        for bit in range(8):
+            if column.translate(BIT_TABLES[bit]).count(1) > threshold:
+                fingerprint |= 1 << ((7 - position) * 8 + bit)
+    return fingerprint
+
+def simhash_bands(fingerprint: int) -> List[int]:
+    """Split a fingerprint into the band values that are indexed, lowest bits first."""
+    return [(fingerprint >> (band * SIMHASH_BAND_BITS)) & SIMHASH_BAND_MASK for band in range(SIMHASH_BANDS)]
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def diff_size(old: Optional[str], new: Optional[str]) -> int:
+    """Number of words inserted, deleted or replaced between two texts."""
+    matcher = difflib.SequenceMatcher(None, words(old), words(new), autojunk=False)
+    return sum(
+        max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"
+    )
+
+class NearDuplicateDetector:
+    def __init__(self, storage: Any, max_distance: int = 6):
+        """Find articles whose content is nearly the same as an article already stored.
+
+        Args:
+            storage: NewsStorage holding the fingerprints of stored articles
+            max_distance: Largest Hamming distance between fingerprints that counts as a
+                near-duplicate, below SIMHASH_BANDS so the band index finds every match
+        """
+        if not 0 <= max_distance < SIMHASH_BANDS:
+            raise ValueError(f"max_distance must be between 0 and {SIMHASH_BANDS - 1}")
+        self.storage = storage
+        self.max_distance = max_distance
+
+    def find(self, fingerprint: int) -> Optional[Tuple[str, int]]:
+        """Return the URL and distance of the closest stored article within max_distance, or None."""
+        best = None
+        for url, stored in self.storage.simhash_candidates(fingerprint):
+            distance = hamming_distance(fingerprint, stored)
+            if distance <= self.max_distance and (best is None or distance < best[1]):
+                best = (url, distance)
+        return best
+
+    def mark(self, articles: List[Dict[str, Any]]) -> int:
+        """Fingerprint articles and mark the near-duplicates of stored or earlier articles.
+
+        Sets "simhash" on every article. Near-duplicates also get "duplicate_of", the URL
+        of the matching article, and "diff_size", the number of words that differ from it.
+        An article that nearly matches the stored version of its own URL is a minor update.
+
+        Returns:
+            Number of near-duplicates
+        """
+        duplicates = 0
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        for article in articles:
+            fingerprint = simhash(article.get("content"))
+            article["simhash"] = fingerprint
+            article["duplicate_of"] = None
+            article["diff_size"] = None
+            if fingerprint is None:
+                continue
+
+            match = self.find(fingerprint)
+            match_content = None
+            for other_fingerprint, other in batch:
+                distance = hamming_distance(fingerprint, other_fingerprint)
+                if distance <= self.max_distance and (match is None or distance < match[1]):
+                    match = (other["url"], distance)
+                    match_content = other.get("content")
+            batch.append((fingerprint, article))
+            if match is None:
+                continue
+
+            if match_content is None:
+                match_content = self.storage.get_article_content(match[0])
+            article["duplicate_of"] = match[0]
+            article["diff_size"] = diff_size(match_content, article.get("content"))
+            duplicates += 1
+        return duplicates
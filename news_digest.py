@@ -0,0 +1,162 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple
+from metrics import METRICS
+from news_storage import NewsStorage, to_epoch
+
+DIGEST_MAPS = METRICS.counter("digest_map_batches_total", "Map step batches of digests by result")
+DIGEST_REDUCES = METRICS.counter("digest_reduce_calls_total", "Reduce step calls of digests")
+
+class DigestBuilder:
+    def __init__(self, analyzer: Any, storage: NewsStorage, max_concurrent_analyses: int = 3,
+                 ttl: float = 7 * 24 * 3600):
+        """Build one digest of many articles by map-reduce.
+
+        The map step analyzes batches of articles in parallel and stores every result
+        with the articles it covers. The reduce step merges the partial analyses into
+        one digest. A later window that overlaps earlier ones reuses the stored map
+        results whose articles are unchanged, so only new articles are mapped again.
+
+        Args:
+            analyzer: GeminiAnalyzer used for the map and reduce calls
+            storage: NewsStorage that keeps the map results
+            max_concurrent_analyses: Maximum number of Gemini calls running at once
+            ttl: Seconds a map result is kept for reuse
+        """
+        self.analyzer = analyzer
+        self.storage = storage
+        self.max_concurrent_analyses = max_concurrent_analyses
+        self.ttl = ttl
+
+        # Counts of the last build: articles, reused, mapped, failed, reduce_calls
+        self.last_build_stats: Dict[str, int] = {}
+
+    def article_hash(self, article: Dict[str, Any]) -> str:
+        """Hash of the map prompt of an article alone, which changes with its content, the model or the prompt."""
+        return self.analyzer.cache_key(self.analyzer.build_prompt([article]))
+
+    def reusable_results(self, articles: List[Dict[str, Any]],
+                         hashes: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Pick stored map results that only cover current, unchanged articles, without overlaps.
+
+        Newer results are preferred, so a window keeps the batches it mapped most recently.
+        """
+        times = [epoch for epoch in (to_epoch(article.get("time")) for article in articles) if epoch is not None]
+        if not times:
+            return []
+        covered = set()
+        chosen = []
+        for result in self.storage.get_map_results(self.analyzer.model, min(times)):
+            urls = result["articles"]
+            if not urls or covered.intersection(urls):
+                continue
+            if all(hashes.get(url) == content_hash for url, content_hash in urls.items()):
+                chosen.append(result)
+                covered.update(urls)
+        return chosen
+
+    def map_batch(self, batch: List[Dict[str, Any]]) -> Optional[Tuple[Optional[int], str]]:
+        """Analyze one batch of articles and store the result.
+
+        Returns:
+            Tuple of (newest article time in UTC epoch seconds, analysis), or None if the call failed
+        """
+        try:
+            analysis = self.analyzer.generate(self.analyzer.build_prompt(batch))
+        except Exception as e:
+            print(f"Error analyzing a batch of {len(batch)} articles with Gemini: {e}")
+            DIGEST_MAPS.inc(result="error")
+            return None
+        times = [epoch for epoch in (to_epoch(article.get("time")) for article in batch) if epoch is not None]
+        oldest, newest = (min(times), max(times)) if times else (None, None)
+        self.storage.save_map_result(
+            self.analyzer.model, {article["url"]: article["_digest_hash"] for article in batch},
+            oldest, newest, analysis
+        )
+        self.storage.mark_analyzed(batch)
+        DIGEST_MAPS.inc(result="mapped")
+        return newest, analysis
+
+    def reduce_groups(self, analyses: List[str]) -> List[List[str]]:
+        """Pack partial analyses in order into groups whose reduce prompt fits the token budget.
+
+        Every group has at least two analyses, so each round of reduces shrinks the list.
+        """
+        budget = self.analyzer.batch_token_budget - self.analyzer.estimate_tokens(self.analyzer.REDUCE_PROMPT_TEMPLATE)
+        groups: List[List[str]] = []
+        group: List[str] = []
+        group_tokens = 0
+        for analysis in analyses:
+            tokens = self.analyzer.estimate_tokens(analysis)
+            if len(group) >= 2 and group_tokens + tokens > budget:
+                groups.append(group)
+                group, group_tokens = [], 0
+            group.append(analysis)
+            group_tokens += tokens
+        if group:
+            if len(group) == 1 and groups:
+                groups[-1].append(group[0])
+            else:
+                groups.append(group)
+        return groups
+
+    def reduce(self, analyses: List[str], executor: ThreadPoolExecutor) -> str:
+        """Merge partial analyses, newest first, into one digest.
+
+        Analyses that do not fit one prompt are merged in rounds, the groups of a round in parallel.
+        Unchanged groups are answered from the analysis cache.
+        """
+        while len(analyses) > 1:
+            groups = self.reduce_groups(analyses)
+            prompts = [self.analyzer.build_reduce_prompt(group) for group in groups]
+            analyses = list(executor.map(self.analyzer.generate, prompts))
+            self.last_build_stats["reduce_calls"] += len(prompts)
+            DIGEST_REDUCES.inc(len(prompts))
+        return analyses[0]
+
+    def build(self, articles: List[Dict[str, Any]]) -> Optional[str]:
+        """Build the digest of a window of articles.
+
+        Args:
+            articles: List of article dictionaries with title, url, time and content
+
+        Returns:
+            The digest, or None if there were no articles or every map call failed
+
+        Raises:
+            Exception: If a reduce call fails
+        """
+        self.last_build_stats = {"articles": len(articles), "reused": 0, "mapped": 0, "failed": 0, "reduce_calls": 0}
+        if not articles:
+            return None
+        start = time.perf_counter()
+
+        hashes = {article["url"]: self.article_hash(article) for article in articles}
+        reused = self.reusable_results(articles, hashes)
+        covered = {url for result in reused for url in result["articles"]}
+        partials = [(result["newest_time_utc"], result["analysis"]) for result in reused]
+        self.last_build_stats["reused"] = len(covered)
+
+        new_articles = [dict(article, _digest_hash=hashes[article["url"]])
+                        for article in articles if article["url"] not in covered]
+        batches = self.analyzer.make_batches(new_articles)
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrent_analyses)) as executor:
+            for batch, partial in zip(batches, executor.map(self.map_batch, batches)):
+                if partial is None:
+                    self.last_build_stats["failed"] += len(batch)
+                else:
+                    self.last_build_stats["mapped"] += len(batch)
+                    partials.append(partial)
+            if not partials:
+                return None
+
+            # Newest first, ties by text, so an unchanged window builds the same reduce prompts
+            partials.sort(key=lambda partial: (partial[0] or 0, partial[1]), reverse=True)
+            digest = self.reduce([analysis for _, analysis in partials], executor)
+
+        self.storage.evict_map_results(self.ttl)
+        stats = self.last_build_stats
+        print(f"Built a digest of {stats['articles']} articles in {time.perf_counter() - start:.1f}s: "
+              f"{stats['reused']} reused, {stats['mapped']} mapped, {stats['failed']} failed, "
+              f"{stats['reduce_calls']} reduce calls")
+        return digest
@@ -0,0 +1,272 @@
+import queue
+import threading as td
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional
+from metrics import Trace
+from crawl_engine import CrawlEngine
+
+# Marks the end of the stream on a stage queue
+_END = object()
+
+class NewsPipeline:
+    def __init__(self, crawler: Any, analyzer: Any, deliver: Callable[[str], Any],
+                 queue_size: int = 16, max_concurrent_analyses: int = 3, relevance_filter: Any = None,
+                 tracer: Any = None, engine: Optional[CrawlEngine] = None):
+        """Staged pipeline from the homepage to Discord: fetch -> parse -> persist -> analyze -> deliver.
+
+        Stages run in their own threads and are connected by bounded queues, so a slow
+        stage makes the stages before it wait instead of piling up work in memory.
+        Articles are analyzed as soon as a batch fills, not after the whole crawl.
+
+        Args:
+            crawler: CNNCrawler used to fetch, parse and save articles
+            analyzer: GeminiAnalyzer used to batch and analyze articles
+            deliver: Called with each analysis, in batch order
+            queue_size: Capacity of each queue between stages
+            max_concurrent_analyses: Maximum number of analysis calls running at once
+            relevance_filter: RelevanceFilter applied before analysis, or None to analyze everything
+            tracer: Tracer that records a span per stage and per batch of every run, or None
+            engine: CrawlEngine with the sources whose listings are crawled at once, each
+                with its own fetch workers. If None, the crawler's own source.
+        """
+        self.crawler = crawler
+        self.analyzer = analyzer
+        self.deliver = deliver
+        self.queue_size = queue_size
+        self.max_concurrent_analyses = max_concurrent_analyses
+        self.relevance_filter = relevance_filter
+        self.tracer = tracer
+        self.engine = engine if engine is not None else CrawlEngine(crawler)
+
+        # Stats of the last run
+        self.last_run_stats: Dict[str, Any] = {}
+
+    def run(self) -> int:
+        """Crawl the listings of every source and stream new articles through every stage.
+
+        Returns:
+            Number of articles saved
+        """
+        start_time = time.perf_counter()
+        trace = self.tracer.start_trace("news_task") if self.tracer is not None else Trace("news_task", enabled=False)
+        stats = {"found": 0, "fetched": 0, "parsed": 0, "saved": 0, "retitled": 0, "duplicates": 0, "filtered": 0, "batches": 0, "delivered": 0}
+        stats_lock = td.Lock()
+
+        def count(key: str, number: int = 1) -> None:
+            with stats_lock:
+                stats[key] += number
+
+        def handle(urls: Any) -> None:
+            with stats_lock:
+                handled.update(urls)
+
+        sources = list(self.engine.sources.values())
+        # One fetch queue and set of workers per source, so each site gets its own concurrency
+        fetch_queues = {source.name: queue.Queue() for source in sources}
+        fetch_workers = {source.name: self.engine.fetch_workers(source) for source in sources}
+        # New cards per source and the URLs saved or retitled, a source with cards left to retry
+        # has its listing fetched in full next time
+        new_cards: Dict[str, List[Any]] = {}
+        handled = set()
+        parse_queue: queue.Queue = queue.Queue(self.queue_size)
+        persist_queue: queue.Queue = queue.Queue(self.queue_size)
+        analyze_queue: queue.Queue = queue.Queue(self.queue_size)
+        # Holds analysis futures in batch order, its size bounds the analyses in flight
+        deliver_queue: queue.Queue = queue.Queue(max(1, self.max_concurrent_analyses))
+
+        def drain(stage_queue: queue.Queue, ends: int) -> None:
+            # A failed stage discards the rest of its input, so the stages before it are not blocked
+            while ends > 0:
+                if stage_queue.get() is _END:
+                    ends -= 1
+
+        def fetch_stage(source: Any) -> None:
+            fetch_queue = fetch_queues[source.name]
+            try:
+                while True:
+                    item = fetch_queue.get()
+                    if item is _END:
+                        return
+                    url, title = item
+                    try:
+                        response, unchanged = self.crawler.conditional_request(url)
+                        # A card retitled over an unchanged page only needs its stored title updated
+                        if unchanged and self.crawler.retitle_article(url, title):
+                            count("retitled")
+                            handle([url])
+                    except Exception as e:
+                        print(f"Error fetching {url}: {e}")
+                        continue
+                    if response:
+                        count("fetched")
+                        parse_queue.put((response, url, title, source))
+            except Exception as e:
+                print(f"Error in the fetch stage of {source.name}: {e}")
+            finally:
+                parse_queue.put(_END)
+
+        def parse_stage() -> None:
+            fetchers = sum(fetch_workers.values())
+            finished_fetchers = 0
+            try:
+                while finished_fetchers < fetchers:
+                    item = parse_queue.get()
+                    if item is _END:
+                        finished_fetchers += 1
+                        continue
+                    article = self.crawler.parse_article_response(*item)
+                    if article:
+                        count("parsed")
+                        persist_queue.put(article)
+            except Exception as e:
+                print(f"Error in the parse stage: {e}")
+                drain(parse_queue, fetchers - finished_fetchers)
+            finally:
+                persist_queue.put(_END)
+
+        def persist_stage() -> None:
+            pending: List[Dict[str, Any]] = []
+            # URLs sent for analysis in this run, their near-duplicates are skipped too
+            queued_urls = set()
+            finished = False
+            try:
+                while not finished:
+                    # Save what has arrived whenever the stage goes idle or a batch is full
+                    try:
+                        item = persist_queue.get(timeout=0.5 if pending else None)
+                    except queue.Empty:
+                        item = None
+                    if item is _END:
+                        finished = True
+                    elif item is not None:
+                        pending.append(item)
+                    if pending and (item is None or finished or len(pending) >= self.crawler.save_batch_size):
+                        try:
+                            with trace.span("save_batch", articles=len(pending)):
+                                count("saved", self.crawler.save_articles_to_db(pending))
+                            handle(article["url"] for article in pending)
+                        except Exception as e:
+                            # Articles that could not be saved are not analyzed either
+                            print(f"Error saving {len(pending)} articles: {e}")
+                            pending = []
+                        # Near-duplicates of analyzed articles are not analyzed again
+                        distinct = self.crawler.skip_analyzed_duplicates(pending, queued_urls)
+                        count("duplicates", len(pending) - len(distinct))
+                        for article in distinct:
+                            queued_urls.add(article["url"])
+                            analyze_queue.put(self.to_analysis_input(article))
+                        pending = []
+            except Exception as e:
+                print(f"Error in the persist stage: {e}")
+                drain(persist_queue, 0 if finished else 1)
+            finally:
+                analyze_queue.put(_END)
+
+        def analyze_batch(batch: List[Dict[str, Any]]) -> str:
+            with trace.span("analyze_batch", articles=len(batch)):
+                return self.analyzer.analyze(batch)
+
+        def analyze_stage(executor: ThreadPoolExecutor) -> None:
+            pending: List[Dict[str, Any]] = []
+            finished = False
+            try:
+                while not finished:
+                    item = analyze_queue.get()
+                    if item is _END:
+                        finished = True
+                    elif self.relevance_filter is not None and not self.relevance_filter.is_relevant(item):
+                        count("filtered")
+                        continue
+                    else:
+                        pending.append(item)
+                    batches = self.analyzer.make_batches(pending) if pending else []
+                    # Every batch but the last is full, the last one waits for more articles
+                    ready = batches if finished else batches[:-1]
+                    for batch in ready:
+                        count("batches")
+                        deliver_queue.put(executor.submit(analyze_batch, batch))
+                    pending = [] if finished else (batches[-1] if batches else [])
+            except Exception as e:
+                print(f"Error in the analyze stage: {e}")
+                drain(analyze_queue, 0 if finished else 1)
+            finally:
+                deliver_queue.put(_END)
+
+        def deliver_stage() -> None:
+            while True:
+                future = deliver_queue.get()
+                if future is _END:
+                    return
+                try:
+                    analysis = future.result()
+                    with trace.span("deliver_analysis"):
+                        self.deliver(analysis)
+                    count("delivered")
+                except Exception as e:
+                    print(f"Error delivering analysis: {e}")
+
+        print("Starting news pipeline...")
+        listings = self.engine.fetch_listings(sources, trace)
+        stats["found"] = sum(len(article_data) for _, article_data, _ in listings)
+        print(f"Found {stats['found']} articles to crawl")
+        with trace.span("filter_new"):
+            new_articles = self.crawler.filter_new_articles(
+                [item for _, article_data, _ in listings for item in article_data]
+            )
+        # A story listed by two sources under the same title is fetched from the first one only
+        new_items = set(new_articles)
+        queued_titles = set()
+        for source, article_data, _ in listings:
+            for url, title in article_data:
+                if (url, title) not in new_items or title in queued_titles:
+                    continue
+                queued_titles.add(title)
+                fetch_queues[source.name].put((url, title))
+                new_cards.setdefault(source.name, []).append((url, title))
+        stats["new"] = sum(len(cards) for cards in new_cards.values())
+        for source in sources:
+            for _ in range(fetch_workers[source.name]):
+                fetch_queues[source.name].put(_END)
+
+        def traced(name: str, stage: Callable, *args: Any) -> None:
+            with trace.span(name):
+                stage(*args)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrent_analyses)) as executor:
+            threads = [
+                td.Thread(target=traced, args=("fetch", fetch_stage, source), daemon=True)
+                for source in sources for _ in range(fetch_workers[source.name])
+            ]
+            threads += [
+                td.Thread(target=traced, args=("parse", parse_stage), daemon=True),
+                td.Thread(target=traced, args=("persist", persist_stage), daemon=True),
+                td.Thread(target=traced, args=("analyze", analyze_stage, executor), daemon=True),
+                td.Thread(target=traced, args=("deliver", deliver_stage), daemon=True),
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # Until every new card of a source is saved, retitled or given up, its listing is fetched
+        # in full and the rest are retried
+        for source, _, response in listings:
+            if self.crawler.settle_cards(new_cards.get(source.name, []), handled) == 0:
+                self.crawler.save_validators(source.listing_url, response)
+
+        stats["seconds"] = time.perf_counter() - start_time
+        self.last_run_stats = stats
+        if self.tracer is not None:
+            self.tracer.finish_trace(trace, **stats)
+        print(f"Pipeline finished in {stats['seconds']:.2f}s: {stats['saved']} saved, {stats['retitled']} retitled, "
+              f"{stats['duplicates']} near-duplicates skipped, {stats['filtered']} off-topic skipped, {stats['batches']} batches analyzed, {stats['delivered']} delivered")
+        return stats["saved"]
+
+    @staticmethod
+    def to_analysis_input(article: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep the fields used for analysis, with the time as an ISO string like rows read from the database."""
+        article_time = article["time"]
+        if hasattr(article_time, "isoformat"):
+            article_time = article_time.isoformat()
+        return {"title": article["title"], "url": article["url"], "time": article_time, "content": article["content"]}
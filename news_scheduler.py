@@ -0,0 +1,152 @@
+import threading as td
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Any, Callable
+
+class AdaptiveScheduler:
+    def __init__(self, task: Callable[[], Optional[int]], interval: float = 3600,
+                 min_interval: float = 900, max_interval: float = 7200,
+                 speedup: float = 0.5, backoff: float = 1.5):
+        """Run a task at a fixed rate on one worker thread, adapting the period to how much the task finds.
+
+        A loop thread keeps the time and hands each tick to the worker thread, which is
+        started once and reused for every run. Ticks are scheduled from the previous tick,
+        not from the end of the previous run, so the period does not drift by the length
+        of a run. A tick that arrives while the previous run is still going is skipped
+        instead of starting a second run.
+
+        Args:
+            task: Called on every tick, returns the number of new items it found (or None)
+            interval: Starting period in seconds
+            min_interval: Shortest period, used while every run finds new items
+            max_interval: Longest period, used while runs keep finding nothing
+            speedup: Factor applied to the period after a run that found new items
+            backoff: Factor applied to the period after a run that found nothing
+        """
+        self.task = task
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speedup = speedup
+        self.backoff = backoff
+
+        self._stop_event = td.Event()
+        # Wakes the loop early when the stop flag or the next tick changes
+        self._wake_event = td.Event()
+        # Set by the loop to start a run on the worker, held by the worker while it runs
+        self._run_event = td.Event()
+        self._run_lock = td.Lock()
+        self._thread: Optional[td.Thread] = None
+        self._worker: Optional[td.Thread] = None
+        # Guards the tick times, the period and the counters, which the loop and the worker both update
+        self._state_lock = td.Lock()
+        self._last_tick: Optional[float] = None
+        self._next_run: Optional[float] = None
+
+        self.runs = 0
+        self.skipped = 0
+        self.last_started: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_result: Optional[int] = None
+
+    def start(self, run_now: bool = True) -> None:
+        """Start ticking in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        with self._state_lock:
+            self._next_run = time.monotonic() if run_now else time.monotonic() + self.interval
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = td.Thread(target=self._work, daemon=True)
+            self._worker.start()
+        self._thread = td.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop ticking. A run in progress is allowed to finish."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            with self._state_lock:
+                wait = self._next_run - time.monotonic()
+            if wait > 0:
+                self._wake_event.wait(wait)
+                self._wake_event.clear()
+                continue
+
+            # A run is requested and not picked up yet, or the worker is still running
+            busy = self._run_event.is_set() or self._run_lock.locked()
+            if not busy:
+                self._run_event.set()
+
+            with self._state_lock:
+                if busy:
+                    self.skipped += 1
+                # Fixed rate: the next tick follows this tick, skipping ticks already missed
+                self._last_tick = self._next_run
+                self._next_run = self._last_tick + self.interval
+                now = time.monotonic()
+                while self._next_run <= now:
+                    self._next_run += self.interval
+                    self.skipped += 1
+            if busy:
+                print("Previous run is still going, skipping this tick")
+
+    def _work(self) -> None:
+        while True:
+            self._run_event.wait()
+            with self._run_lock:
+                self._run_event.clear()
+                self._run()
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        self.last_started = datetime.now()
+        try:
+            result = self.task()
+        except Exception as e:
+            print(f"Scheduled task failed: {e}")
+            result = None
+        finally:
+            with self._state_lock:
+                self.last_duration = time.perf_counter() - start
+                self.runs += 1
+
+        self.last_result = result
+        self.adapt(result)
+
+    def adapt(self, new_items: Optional[int]) -> None:
+        """Poll more often after a run that found new items, less often after one that found none.
+
+        The next tick is moved to one new period after the tick that started the run.
+        """
+        if new_items is None:
+            return
+        factor = self.speedup if new_items > 0 else self.backoff
+        with self._state_lock:
+            self.interval = min(self.max_interval, max(self.min_interval, self.interval * factor))
+            if self._last_tick is None:
+                return
+            self._next_run = self._last_tick + self.interval
+        self._wake_event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the scheduling state: next run, current period and last run."""
+        with self._state_lock:
+            next_run = None
+            if self._next_run is not None and not self._stop_event.is_set():
+                next_run = datetime.now() + timedelta(seconds=max(0.0, self._next_run - time.monotonic()))
+            return {
+                "next_run": next_run,
+                "interval": self.interval,
+                "running": self._run_lock.locked(),
+                "runs": self.runs,
+                "skipped": self.skipped,
+                "last_started": self.last_started,
+                "last_duration": self.last_duration,
+                "last_result": self.last_result,
+            }
@@ -0,0 +1,121 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from urllib.parse import urlparse
+from lxml import etree
+from typing import List, Dict, Optional, Any, Tuple, Union
+from cnn_lite_parser import *
+from time_converter import get_timezone, convert_utc_to_eastern
+
+XPathLike = Union[str, etree.XPath]
+
+def compile_xpath(xpath: XPathLike) -> etree.XPath:
+    return xpath if isinstance(xpath, etree.XPath) else etree.XPath(xpath)
+
+class NewsSource(ABC):
+    def __init__(self, name: str, base_url: str, listing_url: Optional[str] = None,
+                 max_in_flight: Optional[int] = None, rate: float = 1.0, capacity: float = 2.0):
+        """A news site the crawler reads: where its listing is and how to parse it.
+
+        Subclasses implement the listing parser, the article parser and the time parser.
+
+        Args:
+            name: Short name of the site, stored in the source column of its articles
+            base_url: Root of the site that article links are resolved against
+            listing_url: Page that lists the latest articles. If None, base_url.
+            max_in_flight: Maximum number of article requests in flight at once for this site.
+                If None, the crawler's max_in_flight.
+            rate: Requests per second allowed for the site's host
+            capacity: Burst size for the site's host
+        """
+        self.name = name
+        self.base_url = base_url
+        self._listing_url = listing_url
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.capacity = capacity
+
+    @property
+    def listing_url(self) -> str:
+        return self._listing_url or self.base_url
+
+    @listing_url.setter
+    def listing_url(self, url: Optional[str]) -> None:
+        self._listing_url = url
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.listing_url).netloc
+
+    @abstractmethod
+    def parse_listing(self, page: Union[str, bytes], encoding: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Extract article URLs and titles from the listing page, newest last."""
+
+    @abstractmethod
+    def parse_article(self, page: Union[str, bytes], url: str, title: str,
+                      encoding: Optional[str] = None) -> Dict[str, Any]:
+        """Extract an article page into a dictionary with title, url, time and content."""
+
+    @abstractmethod
+    def parse_time(self, time_text: str) -> Optional[datetime]:
+        """Parse the timestamp text of an article page, or return None if it has no known format."""
+
+class LiteSource(NewsSource):
+    def __init__(self, name: str, base_url: str, card_xpath: XPathLike, link_xpath: XPathLike,
+                 title_xpath: XPathLike, timestamp_xpath: XPathLike, paragraph_xpath: XPathLike,
+                 time_format: Optional[str] = None, timezone: str = "UTC", time_prefixes: Tuple[str, ...] = (), **kwargs: Any):
+        """A text-only site described by XPath expressions, like CNN Lite.
+
+        Args:
+            name: Short name of the site
+            base_url: Root of the site that article links are resolved against
+            card_xpath: Selects one element per article on the listing page
+            link_xpath: Selects the article link, relative to a card
+            title_xpath: Selects the article title text, relative to a card
+            timestamp_xpath: Selects the timestamp element of an article page
+            paragraph_xpath: Selects the content paragraphs of an article page
+            time_format: strptime format of the timestamp text, or None to skip times
+            timezone: IANA timezone of timestamps parsed with time_format
+            time_prefixes: Text removed from the timestamp before it is parsed, like "Updated:"
+            **kwargs: listing_url, max_in_flight, rate and capacity of NewsSource
+        """
+        super().__init__(name, base_url, **kwargs)
+        # XPath expressions are compiled once and reused for every page
+        self.card_xpath = compile_xpath(card_xpath)
+        self.link_xpath = compile_xpath(link_xpath)
+        self.title_xpath = compile_xpath(title_xpath)
+        self.timestamp_xpath = compile_xpath(timestamp_xpath)
+        self.paragraph_xpath = compile_xpath(paragraph_xpath)
+        self.time_format = time_format
+        self.timezone = timezone
+        self.time_prefixes = time_prefixes
+
+    def parse_listing(self, page: Union[str, bytes], encoding: Optional[str] = None) -> List[Tuple[str, str]]:
+        return extract_article_urls_and_titles(
+            page, self.base_url, encoding, self.card_xpath, self.link_xpath, self.title_xpath
+        )
+
+    def parse_article(self, page: Union[str, bytes], url: str, title: str,
+                      encoding: Optional[str] = None) -> Dict[str, Any]:
+        return extract_article_from_tree(
+            parse_html(page, encoding), url, title, self.timestamp_xpath, self.paragraph_xpath, self.parse_time
+        )
+
+    def parse_time(self, time_text: str) -> Optional[datetime]:
+        if self.time_format is None:
+            return None
+        for prefix in self.time_prefixes:
+            time_text = time_text.replace(prefix, "")
+        local_time = get_timezone(self.timezone).localize(datetime.strptime(time_text.strip(), self.time_format))
+        return convert_utc_to_eastern(local_time)
+
+class CNNLiteSource(LiteSource):
+    def __init__(self, name: str = "cnn", base_url: str = "https://lite.cnn.com", **kwargs: Any):
+        """CNN Lite, or a site with the same markup, parsed with the expressions of cnn_lite_parser."""
+        super().__init__(
+            name, base_url, CARD_XPATH, CARD_HREF_XPATH, CARD_TEXT_XPATH,
+            TIMESTAMP_XPATH, PARAGRAPH_XPATH, **kwargs
+        )
+
+    def parse_time(self, time_text: str) -> Optional[datetime]:
+        # Timestamps name their own timezone, like "Updated: 5:39 PM EST, Mon March 3, 2025"
+        return parse_cnn_lite_time(time_text)
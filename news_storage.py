@@ -0,0 +1,870 @@
+import sqlite3
+import sys
+import time
+import zlib
+import threading as td
+import weakref
+from datetime import datetime
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Set, Tuple, Union
+from metrics import METRICS
+from near_duplicates import SIMHASH_BANDS, SIMHASH_BAND_BITS, SIMHASH_BAND_MASK, simhash, simhash_bands
+
+DB_CALL_SECONDS = METRICS.histogram("news_db_call_seconds", "Time spent in NewsStorage calls, by operation")
+
+def to_epoch(value: Union[datetime, str, None]) -> Optional[int]:
+    """Convert a datetime or ISO string to integer UTC epoch seconds.
+
+    Naive datetimes are taken as local time, like datetime.timestamp() does.
+    Returns None for empty or unparsable values.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return int(value.timestamp())
+
+# Preset dictionary for compressing article content. zlib looks for matches in it
+# before the text itself, so phrases that recur across CNN articles compress
+# well even in short articles. The most common phrases go last.
+CONTENT_DICTIONARY = " ".join([
+    "Wall Street Journal", "New York Times", "Washington Post", "Associated Press", "Reuters",
+    "S&P 500", "Dow Jones Industrial Average", "Nasdaq Composite", "10-year Treasury yield",
+    "basis points", "percentage points", "the Federal Reserve", "Fed Chair Jerome Powell",
+    "interest rates", "inflation", "the economy", "the US economy", "consumer prices", "tariffs on",
+    "the stock market", "investors", "earnings", "revenue", "billion", "million", "trillion",
+    "the White House", "the Trump administration", "President Donald Trump", "the president",
+    "Congress", "Republicans", "Democrats", "the Senate", "the House", "lawmakers",
+    "the United States", "China", "Russia", "Ukraine", "Israel", "Europe",
+    "Apple", "Google", "Amazon", "Microsoft", "Nvidia", "Tesla", "Meta",
+    "said in a statement", "told reporters", "declined to comment", "did not immediately respond to",
+    "a request for comment", "according to", "on Monday", "on Tuesday", "on Wednesday",
+    "on Thursday", "on Friday", "on Saturday", "on Sunday", "last week", "this week", "this year",
+    "last year", "in a statement", "CNN has reached out", "told CNN", "CNN's", "CNN", "that the",
+    "of the", "in the", "to the", "for the", "on the", "and the", "with the", "it is", "has been",
+    "have been", "would be", "will be", "said.", "said", "the ", "The ",
+]).encode("utf-8")
+
+# Compressed content starts with this marker followed by the dictionary id, so
+# plain text rows written before compression can still be read
+COMPRESSED_MARKER = b"Z"
+CONTENT_DICTIONARY_ID = 1
+CONTENT_DICTIONARIES = {CONTENT_DICTIONARY_ID: CONTENT_DICTIONARY}
+
+def to_signed64(value: Optional[int]) -> Optional[int]:
+    """Map an unsigned 64-bit fingerprint to the signed range SQLite integers can hold."""
+    if value is None:
+        return None
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def compress_content(content: Union[str, bytes, None]) -> Union[str, bytes, None]:
+    """Compress article content with the shared dictionary, or keep it as text if that is not smaller.
+
+    Bytes are taken as content compressed already, e.g. by a backfill worker, and returned as is.
+    """
+    if not content or isinstance(content, bytes):
+        return content
+    raw = content.encode("utf-8")
+    compressor = zlib.compressobj(level=9, wbits=-15, zdict=CONTENT_DICTIONARY)
+    compressed = COMPRESSED_MARKER + bytes([CONTENT_DICTIONARY_ID]) + compressor.compress(raw) + compressor.flush()
+    return compressed if len(compressed) < len(raw) else content
+
+def decompress_content(value: Union[str, bytes, None]) -> Optional[str]:
+    """Return the plain text of a stored content value, compressed or not."""
+    if not isinstance(value, bytes):
+        return value
+    if not value.startswith(COMPRESSED_MARKER):
+        return value.decode("utf-8")
+    decompressor = zlib.decompressobj(wbits=-15, zdict=CONTENT_DICTIONARIES[value[1]])
+    return (decompressor.decompress(value[2:]) + decompressor.flush()).decode("utf-8")
+
+class _ThreadConnection:
+    """Holds the connection of one thread. Dropped with the thread's locals when the thread exits."""
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+def _close_thread_connection(conn: sqlite3.Connection, connections: List[sqlite3.Connection],
+                             lock: td.Lock) -> None:
+    with lock:
+        if conn in connections:
+            connections.remove(conn)
+    conn.close()
+
+class NewsStorage:
+    # SQL statements are kept constant so sqlite3's statement cache can reuse
+    # the prepared statements across calls
+    SQL_TITLE_EXISTS = "SELECT 1 FROM articles WHERE title = ? LIMIT 1"
+    SQL_ALL_TITLES = "SELECT title FROM articles"
+    SQL_UPSERT_ARTICLE = (
+        "INSERT INTO articles (title, url, time, time_utc, content, simhash, duplicate_of, diff_size, source) "
+        "VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, COALESCE(?9, 'cnn')) "
+        "ON CONFLICT(url) DO UPDATE SET title = excluded.title, time = excluded.time, "
+        "time_utc = excluded.time_utc, content = excluded.content, simhash = excluded.simhash, "
+        "duplicate_of = excluded.duplicate_of, diff_size = excluded.diff_size, "
+        "source = COALESCE(?9, articles.source)"
+    )
+    SQL_ARTICLES_BY_NUMBER = (
+        "SELECT title, url, time, content, duplicate_of, source FROM articles ORDER BY time_utc DESC LIMIT ?"
+    )
+    SQL_ARTICLES_BY_TIME = (
+        "SELECT title, url, time, content, duplicate_of, source FROM articles WHERE time_utc > ? ORDER BY time_utc DESC"
+    )
+    # One indexed lookup per band of the fingerprint, the expressions match the band indexes
+    SQL_SIMHASH_CANDIDATES = " UNION ".join(
+        f"SELECT url, simhash FROM articles WHERE ((simhash >> {band * SIMHASH_BAND_BITS}) & {SIMHASH_BAND_MASK}) = ?"
+        for band in range(SIMHASH_BANDS)
+    )
+    SQL_MARK_ANALYZED = (
+        "INSERT INTO analyzed_articles (url, simhash, analyzed_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(url) DO UPDATE SET simhash = excluded.simhash, analyzed_at = excluded.analyzed_at"
+    )
+    SQL_UNMARK_ANALYZED = "DELETE FROM analyzed_articles WHERE url = ?"
+    SQL_GET_HTTP_CACHE = "SELECT etag, last_modified, content_hash FROM http_cache WHERE url = ?"
+    SQL_SAVE_HTTP_CACHE = (
+        "INSERT INTO http_cache (url, etag, last_modified, content_hash, fetched_at) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+        "content_hash = excluded.content_hash, fetched_at = excluded.fetched_at"
+    )
+
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -16000",
+        "PRAGMA mmap_size = 134217728",
+        "PRAGMA busy_timeout = 5000",
+    )
+
+    # Maximum number of bound parameters used in one IN (...) query
+    LOOKUP_CHUNK_SIZE = 500
+
+    # Number of rows fetched at a time by the streaming queries
+    FETCH_CHUNK_SIZE = 200
+
+    def __init__(self, db_file: str = "cnn_news.db"):
+        """SQLite storage that keeps one connection per thread, for as long as the thread lives.
+
+        The database runs in WAL mode, so readers in one thread do not block the
+        writer in another. Writes are serialized with a lock. A thread's connection
+        is closed when the thread exits, so the worker threads started by every
+        crawl do not leave connections behind.
+
+        Args:
+            db_file: Path of the SQLite database file
+        """
+        self.db_file = db_file
+        self._local = td.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = td.Lock()
+        self._write_lock = td.Lock()
+
+        # Titles known to be stored, so most dedup checks never touch SQLite
+        self._seen_titles: Set[str] = set()
+
+        self.setup_database()
+        self.warm_seen_titles()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread, opening it on first use."""
+        holder = getattr(self._local, "holder", None)
+        if holder is not None:
+            return holder.conn
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, cached_statements=128)
+        conn.row_factory = sqlite3.Row
+        # Used by the full-text index triggers to index the plain text of compressed content
+        conn.create_function("decompress_content", 1, decompress_content, deterministic=True)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        holder = _ThreadConnection(conn)
+        # Thread locals are dropped when the thread exits, which closes the connection
+        weakref.finalize(holder, _close_thread_connection, conn, self._connections, self._connections_lock)
+        self._local.holder = holder
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Close all connections opened by this storage."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = td.local()
+
+    def setup_database(self) -> None:
+        """Set up the SQLite database and create tables if they don't exist."""
+        conn = self.connection()
+        with self._write_lock, conn:
+            # Create articles table if it doesn't exist
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL UNIQUE,
+                time TIMESTAMP,
+                time_utc INTEGER,
+                content TEXT,
+                simhash INTEGER,
+                duplicate_of TEXT,
+                diff_size INTEGER,
+                source TEXT DEFAULT 'cnn'
+            )
+            ''')
+            self.migrate_time_utc(conn)
+            self.migrate_near_duplicates(conn)
+            self.migrate_source(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_time_utc ON articles(time_utc)")
+            # One index per band of the content fingerprint, for near-duplicate lookups
+            for band in range(SIMHASH_BANDS):
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_articles_simhash_{band} "
+                    f"ON articles(((simhash >> {band * SIMHASH_BAND_BITS}) & {SIMHASH_BAND_MASK}))"
+                )
+            # url is UNIQUE and already indexed, title needs its own index for dedup
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title)")
+            # Gemini analyses keyed by a hash of the model and the full prompt
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                analysis TEXT,
+                created_at REAL,
+                last_used REAL
+            )
+            ''')
+            # Map step analyses of article batches, reused by later digests that cover the same articles
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS map_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                model TEXT,
+                oldest_time_utc INTEGER,
+                newest_time_utc INTEGER,
+                analysis TEXT,
+                created_at REAL
+            )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_map_results_oldest ON map_results(oldest_time_utc)")
+            # The articles each map result covers, with a hash of the content that was analyzed
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS map_result_articles (
+                map_id INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                content_hash TEXT,
+                PRIMARY KEY (map_id, url)
+            ) WITHOUT ROWID
+            ''')
+            # Articles that were analyzed, with the fingerprint of the content that was analyzed, so
+            # their near-duplicates can skip analysis. Kept apart from articles, where every update
+            # would reindex the content for search.
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS analyzed_articles (
+                url TEXT PRIMARY KEY,
+                simhash INTEGER,
+                analyzed_at REAL
+            ) WITHOUT ROWID
+            ''')
+            self.migrate_analyzed_fingerprints(conn)
+            # HTTP validators of fetched pages, used for conditional requests
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                fetched_at TIMESTAMP
+            )
+            ''')
+            self.migrate_http_cache(conn)
+
+        self.fts_enabled = self.setup_full_text_index()
+
+        print(f"Database setup complete: {self.db_file}")
+
+    def migrate_time_utc(self, conn: sqlite3.Connection) -> None:
+        """Add the time_utc column to a database created before it existed and fill it from time."""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(articles)")]
+        if "time_utc" in columns:
+            return
+
+        print("Migrating articles: adding time_utc column")
+        conn.execute("ALTER TABLE articles ADD COLUMN time_utc INTEGER")
+        rows = conn.execute("SELECT id, time FROM articles WHERE time IS NOT NULL").fetchall()
+        conn.executemany(
+            "UPDATE articles SET time_utc = ? WHERE id = ?",
+            [(to_epoch(row[1]), row[0]) for row in rows]
+        )
+
+    def migrate_near_duplicates(self, conn: sqlite3.Connection) -> None:
+        """Add the fingerprint columns to a database created before they existed.
+
+        Stored articles stay unfingerprinted until `python news_storage.py fingerprint` is run.
+        """
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(articles)")]
+        for column, column_type in (("simhash", "INTEGER"), ("duplicate_of", "TEXT"), ("diff_size", "INTEGER")):
+            if column not in columns:
+                print(f"Migrating articles: adding {column} column")
+                conn.execute(f"ALTER TABLE articles ADD COLUMN {column} {column_type}")
+
+    def migrate_analyzed_fingerprints(self, conn: sqlite3.Connection) -> None:
+        """Add the fingerprint column to analyzed_articles if it was created without one.
+
+        Articles marked until then have no fingerprint, so their near-duplicates are analyzed once more.
+        """
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(analyzed_articles)")]
+        if "simhash" in columns:
+            return
+
+        print("Migrating analyzed_articles: adding simhash column")
+        conn.execute("ALTER TABLE analyzed_articles ADD COLUMN simhash INTEGER")
+
+    def migrate_http_cache(self, conn: sqlite3.Connection) -> None:
+        """Drop the validators of pages whose content was never stored, once per database.
+
+        Validators are only kept for pages whose content is stored. Older versions saved
+        them on fetch, so an article that failed to save looked unchanged forever. The
+        listing page is also dropped and fetched in full once. Done databases have
+        user_version 1, so later startups keep the validators.
+        """
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+            return
+
+        conn.execute("DELETE FROM http_cache WHERE url NOT IN (SELECT url FROM articles)")
+        conn.execute("PRAGMA user_version = 1")
+
+    def migrate_source(self, conn: sqlite3.Connection) -> None:
+        """Add the source column to a database created before it existed.
+
+        Every article stored until then came from CNN Lite. The column default fills
+        them in without rewriting every row, which would also reindex them for search.
+        """
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(articles)")]
+        if "source" in columns:
+            return
+
+        print("Migrating articles: adding source column")
+        conn.execute("ALTER TABLE articles ADD COLUMN source TEXT DEFAULT 'cnn'")
+
+    def setup_full_text_index(self) -> bool:
+        """Create the FTS5 index over article titles and content, kept in sync by triggers.
+
+        Returns:
+            True if the index is available, False if this SQLite build has no FTS5
+        """
+        conn = self.connection()
+        with self._write_lock:
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+            ).fetchone()
+            exists = row is not None
+            try:
+                with conn:
+                    # Indexes built on the raw articles table would index compressed bytes
+                    if exists and "content='articles'" in row[0]:
+                        for trigger in ("articles_fts_insert", "articles_fts_delete", "articles_fts_update"):
+                            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                        conn.execute("DROP TABLE articles_fts")
+                        exists = False
+                    # The index reads plain text through a view that decompresses content
+                    conn.execute(
+                        "CREATE VIEW IF NOT EXISTS articles_text AS "
+                        "SELECT id, title, decompress_content(content) AS content FROM articles"
+                    )
+                    conn.execute(
+                        "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts "
+                        "USING fts5(title, content, content='articles_text', content_rowid='id')"
+                    )
+                    conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+                        INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, decompress_content(new.content));
+                    END
+                    ''')
+                    conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+                        INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, decompress_content(old.content));
+                    END
+                    ''')
+                    conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+                        INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, decompress_content(old.content));
+                        INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, decompress_content(new.content));
+                    END
+                    ''')
+                    # Index the articles stored before the index existed
+                    if not exists:
+                        conn.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+            except sqlite3.OperationalError as e:
+                print(f"Full-text search disabled: {e}")
+                return False
+        return True
+
+    def warm_seen_titles(self) -> None:
+        """Load every stored title into the in-memory seen-set."""
+        cursor = self.connection().execute(self.SQL_ALL_TITLES)
+        self._seen_titles.update(row[0] for row in cursor)
+
+    def title_exists(self, title: str) -> bool:
+        """Check if an article with the given title already exists in the database."""
+        if title in self._seen_titles:
+            return True
+        cursor = self.connection().execute(self.SQL_TITLE_EXISTS, (title,))
+        if cursor.fetchone() is None:
+            return False
+        self._seen_titles.add(title)
+        return True
+
+    @DB_CALL_SECONDS.time(operation="update_title")
+    def update_title(self, url: str, title: str) -> bool:
+        """Give the article stored under url a new title.
+
+        Returns:
+            True if the article is stored, False if there is no article under url
+        """
+        conn = self.connection()
+        with self._write_lock:
+            with conn:
+                updated = conn.execute("UPDATE articles SET title = ? WHERE url = ?", (title, url)).rowcount > 0
+            if updated:
+                self._seen_titles.add(title)
+        return updated
+
+    @DB_CALL_SECONDS.time(operation="existing_titles")
+    def existing_titles(self, titles: Iterable[str]) -> Set[str]:
+        """Return the subset of titles that are already stored.
+
+        Titles in the seen-set are resolved in memory, the rest are looked up with
+        one indexed IN (...) query per chunk instead of one query per title.
+        """
+        titles = set(titles)
+        existing = titles & self._seen_titles
+        unknown = list(titles - existing)
+
+        conn = self.connection()
+        for i in range(0, len(unknown), self.LOOKUP_CHUNK_SIZE):
+            chunk = unknown[i:i + self.LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(f"SELECT DISTINCT title FROM articles WHERE title IN ({placeholders})", chunk)
+            existing.update(row[0] for row in cursor)
+
+        self._seen_titles.update(existing)
+        return existing
+
+    def existing_urls(self, urls: Iterable[str]) -> Set[str]:
+        """Return the subset of urls that are already stored."""
+        urls = list(set(urls))
+        existing: Set[str] = set()
+
+        conn = self.connection()
+        for i in range(0, len(urls), self.LOOKUP_CHUNK_SIZE):
+            chunk = urls[i:i + self.LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(f"SELECT url FROM articles WHERE url IN ({placeholders})", chunk)
+            existing.update(row[0] for row in cursor)
+
+        return existing
+
+    @DB_CALL_SECONDS.time(operation="save_articles")
+    def save_articles(self, articles: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Upsert many articles in a single transaction.
+
+        Articles whose URL is already stored have their title, time and content
+        updated. If the same URL appears more than once, the last one wins.
+
+        Args:
+            articles: List of article dictionaries with title, url, time and content
+
+        Returns:
+            Tuple of (number of rows inserted, number of rows updated)
+        """
+        if not articles:
+            return 0, 0
+
+        rows = []
+        for article in articles:
+            # Convert datetime to string if it's a datetime object
+            article_time = article["time"]
+            if isinstance(article_time, datetime):
+                article_time = article_time.isoformat()
+            rows.append((
+                article["title"], article["url"], article_time, to_epoch(article_time),
+                compress_content(article["content"]), to_signed64(article.get("simhash")),
+                article.get("duplicate_of"), article.get("diff_size"), article.get("source")
+            ))
+
+        conn = self.connection()
+        with self._write_lock:
+            with conn:
+                # Checked inside the write lock so the split stays exact
+                existing = self.existing_urls(row[1] for row in rows)
+                conn.executemany(self.SQL_UPSERT_ARTICLE, rows)
+                # Changed content has to be analyzed again. A minor update keeps the mark of its URL
+                # and is compared with the fingerprint that was analyzed.
+                conn.executemany(self.SQL_UNMARK_ANALYZED, [(row[1],) for row in rows if row[6] != row[1]])
+            self._seen_titles.update(row[0] for row in rows)
+
+        unique_urls = {row[1] for row in rows}
+        inserted = len(unique_urls - existing)
+        return inserted, len(unique_urls) - inserted
+
+    @DB_CALL_SECONDS.time(operation="mark_analyzed")
+    def mark_analyzed(self, articles: Iterable[Dict[str, Any]]) -> None:
+        """Record that these articles were analyzed, with the fingerprint of the content that was analyzed."""
+        analyzed_at = time.time()
+        rows = {
+            article["url"]: (article["url"], to_signed64(simhash(article.get("content"))), analyzed_at)
+            for article in articles if article.get("url")
+        }
+        if not rows:
+            return
+        conn = self.connection()
+        with self._write_lock, conn:
+            conn.executemany(self.SQL_MARK_ANALYZED, rows.values())
+
+    def unmark_analyzed(self, urls: Iterable[str]) -> None:
+        """Forget that these articles were analyzed, so their next version is analyzed again."""
+        rows = [(url,) for url in set(urls)]
+        if not rows:
+            return
+        conn = self.connection()
+        with self._write_lock, conn:
+            conn.executemany(self.SQL_UNMARK_ANALYZED, rows)
+
+    def analyzed_fingerprints(self, urls: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Return the fingerprint of the analyzed content of every analyzed URL among urls.
+
+        The fingerprint is None if the analyzed content was too short to fingerprint, or
+        was marked before fingerprints were recorded.
+        """
+        urls = list(set(urls))
+        analyzed: Dict[str, Optional[int]] = {}
+
+        conn = self.connection()
+        for i in range(0, len(urls), self.LOOKUP_CHUNK_SIZE):
+            chunk = urls[i:i + self.LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(f"SELECT url, simhash FROM analyzed_articles WHERE url IN ({placeholders})", chunk)
+            analyzed.update(
+                (row[0], row[1] & 0xFFFFFFFFFFFFFFFF if row[1] is not None else None) for row in cursor
+            )
+
+        return analyzed
+
+    def save_article(self, article: Dict[str, Any]) -> bool:
+        """Save an article, updating the existing row if the URL is already stored.
+
+        Returns:
+            True if a new row was inserted, False if an existing row was updated
+        """
+        inserted, _ = self.save_articles([article])
+        return inserted == 1
+
+    def _iter_rows(self, cursor: sqlite3.Cursor) -> Iterator[Dict[str, Any]]:
+        while True:
+            rows = cursor.fetchmany(self.FETCH_CHUNK_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                article = dict(row)
+                if "content" in article:
+                    article["content"] = decompress_content(article["content"])
+                yield article
+
+    def iter_articles_by_number(self, number: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Stream articles ordered by time (newest first), at most number of them if given."""
+        limit = number if isinstance(number, int) and number > 0 else -1
+        return self._iter_rows(self.connection().execute(self.SQL_ARTICLES_BY_NUMBER, (limit,)))
+
+    def iter_articles_by_time(self, cutoff_time: datetime) -> Iterator[Dict[str, Any]]:
+        """Stream articles published after cutoff_time, ordered by time (newest first).
+
+        Naive datetimes are taken as local time.
+        """
+        return self._iter_rows(self.connection().execute(self.SQL_ARTICLES_BY_TIME, (to_epoch(cutoff_time),)))
+
+    @DB_CALL_SECONDS.time(operation="get_articles_by_number")
+    def get_articles_by_number(self, number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Retrieve articles ordered by time (newest first), at most number of them if given."""
+        return list(self.iter_articles_by_number(number))
+
+    @DB_CALL_SECONDS.time(operation="get_articles_by_time")
+    def get_articles_by_time(self, cutoff_time: datetime) -> List[Dict[str, Any]]:
+        """Retrieve articles published after cutoff_time, ordered by time (newest first)."""
+        return list(self.iter_articles_by_time(cutoff_time))
+
+    @DB_CALL_SECONDS.time(operation="simhash_candidates")
+    def simhash_candidates(self, fingerprint: int) -> List[Tuple[str, int]]:
+        """Return the URL and fingerprint of every article that shares a band with fingerprint."""
+        rows = self.connection().execute(self.SQL_SIMHASH_CANDIDATES, simhash_bands(fingerprint)).fetchall()
+        return [(row[0], row[1] & 0xFFFFFFFFFFFFFFFF) for row in rows]
+
+    def get_article_content(self, url: str) -> Optional[str]:
+        """Return the plain-text content of the article stored under url, or None."""
+        row = self.connection().execute("SELECT content FROM articles WHERE url = ?", (url,)).fetchone()
+        return decompress_content(row[0]) if row else None
+
+    def fingerprint_articles(self) -> int:
+        """Fingerprint the content of every article saved before fingerprints were added.
+
+        Returns:
+            Number of articles fingerprinted
+        """
+        conn = self.connection()
+        fingerprinted = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, content FROM articles WHERE id > ? AND simhash IS NULL ORDER BY id LIMIT ?",
+                (last_id, self.FETCH_CHUNK_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            updates = []
+            for article_id, content in rows:
+                fingerprint = simhash(decompress_content(content))
+                if fingerprint is not None:
+                    updates.append((to_signed64(fingerprint), article_id))
+            with self._write_lock, conn:
+                conn.executemany("UPDATE articles SET simhash = ? WHERE id = ?", updates)
+            fingerprinted += len(updates)
+        return fingerprinted
+
+    @DB_CALL_SECONDS.time(operation="get_http_cache")
+    def get_http_cache(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the stored etag, last_modified and content_hash of a URL, or None if never fetched."""
+        row = self.connection().execute(self.SQL_GET_HTTP_CACHE, (url,)).fetchone()
+        return dict(row) if row else None
+
+    @DB_CALL_SECONDS.time(operation="save_http_cache")
+    def save_http_cache(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str) -> None:
+        """Store the validators and body hash of a fetched URL."""
+        conn = self.connection()
+        with self._write_lock, conn:
+            conn.execute(self.SQL_SAVE_HTTP_CACHE, (url, etag, last_modified, content_hash, datetime.now().isoformat()))
+
+    @DB_CALL_SECONDS.time(operation="save_http_cache")
+    def save_http_caches(self, entries: List[Tuple[str, Optional[str], Optional[str], str]]) -> None:
+        """Store the validators and body hashes of many fetched URLs in one transaction.
+
+        Args:
+            entries: Tuples of (url, etag, last_modified, content_hash)
+        """
+        if not entries:
+            return
+        fetched_at = datetime.now().isoformat()
+        conn = self.connection()
+        with self._write_lock, conn:
+            conn.executemany(self.SQL_SAVE_HTTP_CACHE, [entry + (fetched_at,) for entry in entries])
+
+    def delete_http_cache(self, url: str) -> None:
+        """Forget the validators of a URL so the next request fetches it in full."""
+        conn = self.connection()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+
+    @DB_CALL_SECONDS.time(operation="get_analysis")
+    def get_analysis(self, key: str, ttl: Optional[float] = None) -> Optional[str]:
+        """Return a cached analysis and mark it as recently used.
+
+        Args:
+            key: Content hash of the analysis request
+            ttl: Maximum age in seconds. If None, entries never expire.
+
+        Returns:
+            The analysis text, or None if it is not cached or has expired
+        """
+        now = time.time()
+        min_created_at = now - ttl if ttl is not None else float("-inf")
+        conn = self.connection()
+        row = conn.execute(
+            "SELECT analysis FROM analysis_cache WHERE key = ? AND created_at >= ?", (key, min_created_at)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._write_lock, conn:
+            conn.execute("UPDATE analysis_cache SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    @DB_CALL_SECONDS.time(operation="save_analysis")
+    def save_analysis(self, key: str, model: str, analysis: str) -> None:
+        """Store an analysis under its content hash."""
+        now = time.time()
+        conn = self.connection()
+        with self._write_lock, conn:
+            conn.execute(
+                "INSERT INTO analysis_cache (key, model, analysis, created_at, last_used) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET model = excluded.model, analysis = excluded.analysis, "
+                "created_at = excluded.created_at, last_used = excluded.last_used",
+                (key, model, analysis, now, now)
+            )
+
+    @DB_CALL_SECONDS.time(operation="evict_analyses")
+    def evict_analyses(self, ttl: Optional[float] = None, max_entries: Optional[int] = None) -> int:
+        """Delete expired analyses, then the least recently used ones beyond max_entries.
+
+        Returns:
+            Number of entries deleted
+        """
+        conn = self.connection()
+        deleted = 0
+        with self._write_lock, conn:
+            if ttl is not None:
+                deleted += conn.execute(
+                    "DELETE FROM analysis_cache WHERE created_at < ?", (time.time() - ttl,)
+                ).rowcount
+            if max_entries is not None:
+                deleted += conn.execute(
+                    "DELETE FROM analysis_cache WHERE key NOT IN "
+                    "(SELECT key FROM analysis_cache ORDER BY last_used DESC LIMIT ?)", (max_entries,)
+                ).rowcount
+        return deleted
+
+    @DB_CALL_SECONDS.time(operation="save_map_result")
+    def save_map_result(self, model: str, articles: Dict[str, str], oldest_time_utc: Optional[int],
+                        newest_time_utc: Optional[int], analysis: str) -> int:
+        """Store the map step analysis of a batch of articles.
+
+        Args:
+            model: Model that produced the analysis
+            articles: Content hash of every analyzed article, by URL
+            oldest_time_utc: Publication time of the oldest article, in UTC epoch seconds
+            newest_time_utc: Publication time of the newest article, in UTC epoch seconds
+            analysis: The analysis text
+
+        Returns:
+            Id of the map result
+        """
+        conn = self.connection()
+        with self._write_lock, conn:
+            map_id = conn.execute(
+                "INSERT INTO map_results (model, oldest_time_utc, newest_time_utc, analysis, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (model, oldest_time_utc, newest_time_utc, analysis, time.time())
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO map_result_articles (map_id, url, content_hash) VALUES (?, ?, ?)",
+                [(map_id, url, content_hash) for url, content_hash in articles.items()]
+            )
+        return map_id
+
+    @DB_CALL_SECONDS.time(operation="get_map_results")
+    def get_map_results(self, model: str, oldest_time_utc: int) -> List[Dict[str, Any]]:
+        """Return the map results of a model whose articles were all published at or after oldest_time_utc.
+
+        Returns:
+            List of dictionaries with id, newest_time_utc, analysis, created_at and articles,
+            the content hash of every covered article by URL, newest first
+        """
+        conn = self.connection()
+        results = [
+            dict(row, articles={}) for row in conn.execute(
+                "SELECT id, newest_time_utc, analysis, created_at FROM map_results "
+                "WHERE model = ? AND oldest_time_utc >= ? ORDER BY created_at DESC",
+                (model, oldest_time_utc)
+            )
+        ]
+        by_id = {result["id"]: result for result in results}
+        ids = list(by_id)
+        for i in range(0, len(ids), self.LOOKUP_CHUNK_SIZE):
+            chunk = ids[i:i + self.LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(
+                f"SELECT map_id, url, content_hash FROM map_result_articles WHERE map_id IN ({placeholders})", chunk
+            ):
+                by_id[row[0]]["articles"][row[1]] = row[2]
+        return results
+
+    def evict_map_results(self, ttl: float) -> int:
+        """Delete map results older than ttl seconds.
+
+        Returns:
+            Number of map results deleted
+        """
+        conn = self.connection()
+        with self._write_lock, conn:
+            min_created_at = time.time() - ttl
+            conn.execute(
+                "DELETE FROM map_result_articles WHERE map_id IN (SELECT id FROM map_results WHERE created_at < ?)",
+                (min_created_at,)
+            )
+            return conn.execute("DELETE FROM map_results WHERE created_at < ?", (min_created_at,)).rowcount
+
+    @DB_CALL_SECONDS.time(operation="search_articles")
+    def search_articles(self, query: str, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Full-text search over titles and content, best matches first.
+
+        Args:
+            query: FTS5 query, e.g. 'tariffs AND (bonds OR "treasury yield")'
+            limit: Maximum number of articles to return. If None, returns all matches.
+
+        Returns:
+            List of article dictionaries
+        """
+        if not self.fts_enabled:
+            raise RuntimeError("Full-text search is not available in this SQLite build")
+        cursor = self.connection().execute(
+            "SELECT a.title, a.url, a.time, a.content FROM articles_fts "
+            "JOIN articles a ON a.id = articles_fts.rowid "
+            "WHERE articles_fts MATCH ? ORDER BY rank LIMIT ?",
+            (query, limit if isinstance(limit, int) and limit > 0 else -1)
+        )
+        return list(self._iter_rows(cursor))
+
+    def compact(self, vacuum: bool = True) -> Tuple[int, int, int]:
+        """Compress every article whose content is still stored as plain text.
+
+        Args:
+            vacuum: Run VACUUM afterwards so the freed pages are returned to the file system
+
+        Returns:
+            Tuple of (number of articles compressed, file size before, file size after) in bytes
+        """
+        conn = self.connection()
+        size_before = self.database_size()
+        compressed = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, content FROM articles WHERE id > ? AND typeof(content) = 'text' ORDER BY id LIMIT ?",
+                (last_id, self.FETCH_CHUNK_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            updates = []
+            for article_id, content in rows:
+                value = compress_content(content)
+                if isinstance(value, bytes):
+                    updates.append((value, article_id))
+            with self._write_lock, conn:
+                conn.executemany("UPDATE articles SET content = ? WHERE id = ?", updates)
+            compressed += len(updates)
+
+        if vacuum:
+            with self._write_lock:
+                conn.execute("VACUUM")
+        return compressed, size_before, self.database_size()
+
+    def database_size(self) -> int:
+        """Size of the database in bytes, from the page count."""
+        conn = self.connection()
+        return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+if __name__ == "__main__":
+    # Maintenance of databases created by older versions:
+    #   python news_storage.py compact [db_file]      compress content saved before compression was added
+    #   python news_storage.py fingerprint [db_file]  fingerprint content saved before near-duplicate detection
+    if len(sys.argv) < 2 or sys.argv[1] not in ("compact", "fingerprint"):
+        print("Usage: python news_storage.py compact|fingerprint [db_file]")
+        sys.exit(1)
+
+    storage = NewsStorage(sys.argv[2] if len(sys.argv) > 2 else "cnn_news.db")
+    if sys.argv[1] == "compact":
+        compressed, size_before, size_after = storage.compact()
+        print(f"Compressed {compressed} articles: {size_before / 1024:.0f} KiB -> {size_after / 1024:.0f} KiB")
+    else:
+        print(f"Fingerprinted {storage.fingerprint_articles()} articles")
+    storage.close()
@@ -0,0 +1,89 @@
+import threading as td
+import time
+from typing import Dict, Optional
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """Token bucket that refills at a fixed rate.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens the bucket can hold (burst size)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = td.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available.
+
+        Returns:
+            0 if the tokens were taken, otherwise the number of seconds to wait before retrying
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until tokens are available.
+
+        Args:
+            tokens: Number of tokens to take
+            timeout: Maximum number of seconds to wait. If None, waits forever.
+
+        Returns:
+            True if the tokens were taken, False if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+class HostRateLimiter:
+    def __init__(self, rate: float = 1.0, capacity: float = 2.0):
+        """Keep one token bucket per host so each site gets its own request budget.
+
+        Args:
+            rate: Default requests per second allowed for each host
+            capacity: Default burst size for each host
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = td.Lock()
+
+    def configure(self, host: str, rate: float, capacity: Optional[float] = None) -> None:
+        """Set a dedicated rate for a single host."""
+        with self._lock:
+            self._buckets[host] = TokenBucket(rate, capacity if capacity is not None else self.capacity)
+
+    def get_bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, host: str, timeout: Optional[float] = None) -> bool:
+        """Block until a request to the host is allowed."""
+        return self.get_bucket(host).acquire(timeout=timeout)
@@ -0,0 +1,69 @@
+import re
+from typing import List, Dict, Any, Iterable, Optional
+
+# Topics the Gemini prompt asks about
+RELEVANT_KEYWORDS = [
+    'president', 'white house', 'administration', 'congress', 'senate', 'policy', 'policies', 'executive order',
+    'tariff', 'tariffs', 'trade', 'sanction', 'sanctions', 'war', 'military', 'ceasefire', 'nato',
+    'economy', 'economic', 'economics', 'inflation', 'recession', 'gdp', 'jobs report', 'unemployment',
+    'federal reserve', 'fed', 'interest rate', 'interest rates', 'rate cut', 'rate hike',
+    'treasury', 'treasuries', 'bond', 'bonds', 'yield', 'yields', 'dollar', 'currency',
+    'bank', 'banks', 'banking', 'stock', 'stocks', 'shares', 'market', 'markets', 'wall street',
+    'dow', 'nasdaq', 's&p', 'earnings', 'revenue', 'investors', 'oil prices',
+    'apple', 'google', 'alphabet', 'amazon', 'microsoft', 'nvidia', 'tesla', 'meta',
+]
+
+# Topics the prompt tells the model to skip
+IRRELEVANT_KEYWORDS = [
+    'nfl', 'nba', 'mlb', 'nhl', 'super bowl', 'world series', 'playoffs', 'quarterback', 'touchdown',
+    'coach', 'season opener', 'tournament', 'championship', 'olympics', 'golf', 'tennis', 'soccer',
+    'recipe', 'recipes', 'fashion', 'celebrity', 'red carpet', 'oscars', 'grammys', 'album', 'box office',
+    'movie', 'tv series', 'horoscope', 'wellness', 'workout', 'skincare', 'travel guide', 'royal family',
+]
+
+# URL sections that only carry off-topic stories
+IRRELEVANT_SECTIONS = ['sport', 'sports', 'style', 'entertainment', 'travel', 'food', 'celebrities']
+
+def _keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    alternatives = sorted((re.escape(keyword) for keyword in keywords), key=len, reverse=True)
+    return re.compile(r'(?<!\w)(?:' + '|'.join(alternatives) + r')(?!\w)', re.IGNORECASE)
+
+class RelevanceFilter:
+    def __init__(self, relevant_keywords: Optional[List[str]] = None,
+                 irrelevant_keywords: Optional[List[str]] = None,
+                 irrelevant_sections: Optional[List[str]] = None,
+                 title_weight: float = 3.0):
+        """Local keyword ranking that drops clearly off-topic articles before they reach Gemini.
+
+        Only articles with more off-topic than on-topic signal are dropped, so an article
+        the keyword lists know nothing about is still sent to the model.
+
+        Args:
+            relevant_keywords: Keywords of the topics the prompt asks about
+            irrelevant_keywords: Keywords of topics the prompt tells the model to skip
+            irrelevant_sections: URL sections whose stories are always off-topic
+            title_weight: How much more a keyword in the title counts than one in the content
+        """
+        self.relevant_pattern = _keyword_pattern(relevant_keywords or RELEVANT_KEYWORDS)
+        self.irrelevant_pattern = _keyword_pattern(irrelevant_keywords or IRRELEVANT_KEYWORDS)
+        self.irrelevant_sections = set(irrelevant_sections or IRRELEVANT_SECTIONS)
+        self.title_weight = title_weight
+
+    def score(self, article: Dict[str, Any]) -> float:
+        """Score an article, positive when it looks on-topic and negative when it looks off-topic."""
+        title = article.get("title") or ""
+        content = article.get("content") or ""
+        relevant = self.title_weight * len(self.relevant_pattern.findall(title)) + len(self.relevant_pattern.findall(content))
+        irrelevant = self.title_weight * len(self.irrelevant_pattern.findall(title)) + len(self.irrelevant_pattern.findall(content))
+        return relevant - irrelevant
+
+    def is_relevant(self, article: Dict[str, Any]) -> bool:
+        """Return False only for articles that are clearly off-topic."""
+        url = article.get("url") or ""
+        if any(f"/{section}/" in url for section in self.irrelevant_sections):
+            return False
+        return self.score(article) >= 0
+
+    def filter(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the articles that may be relevant, in their original order."""
+        return [article for article in articles if self.is_relevant(article)]
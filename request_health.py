@@ -0,0 +1,143 @@
+import random
+import threading as td
+import time
+from collections import deque
+from typing import List, Dict, Optional, Any, Sequence
+
+class LatencyTracker:
+    def __init__(self, window: int = 50, min_samples: int = 5, quantile: float = 0.95,
+                 multiplier: float = 3.0, min_timeout: float = 3.0, max_timeout: float = 30.0,
+                 default_timeout: float = 10.0):
+        """Derive per-host request timeouts from recent response times.
+
+        Args:
+            window: Number of recent response times kept per host
+            min_samples: Responses needed before the timeout adapts, until then default_timeout is used
+            quantile: Quantile of recent response times the timeout is based on
+            multiplier: Timeout as a multiple of that quantile
+            min_timeout: Shortest timeout in seconds
+            max_timeout: Longest timeout in seconds
+            default_timeout: Timeout in seconds for a host without enough recent responses
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.default_timeout = default_timeout
+        self._samples: Dict[str, deque] = {}
+        self._lock = td.Lock()
+
+    def record(self, host: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(host)
+            if samples is None:
+                samples = self._samples[host] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def latency(self, host: str, quantile: Optional[float] = None) -> Optional[float]:
+        """Return a quantile of the recent response times of a host, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(host, ()))
+        if len(samples) < self.min_samples:
+            return None
+        q = self.quantile if quantile is None else quantile
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def timeout(self, host: str) -> float:
+        """Timeout in seconds for the next request to a host."""
+        latency = self.latency(host)
+        if latency is None:
+            return min(self.max_timeout, self.default_timeout)
+        return min(self.max_timeout, max(self.min_timeout, latency * self.multiplier))
+
+class HealthTracker:
+    def __init__(self, decay: float = 0.7, bench_below: float = 0.4, slow_seconds: float = 10.0,
+                 bench_seconds: float = 300.0, max_bench_seconds: float = 3600.0):
+        """Score items like proxies or user agents by recent outcomes and bench the unhealthy ones.
+
+        The score is a moving average of outcomes: 1 for a fast success, 0.5 for a slow
+        one and 0 for a failure. An item whose score drops below bench_below is left out
+        for bench_seconds, doubled every time it is benched again.
+
+        Args:
+            decay: Weight of the previous score in the moving average
+            bench_below: Score below which an item is benched
+            slow_seconds: Responses slower than this count as half a success
+            bench_seconds: First bench period in seconds
+            max_bench_seconds: Longest bench period in seconds
+        """
+        self.decay = decay
+        self.bench_below = bench_below
+        self.slow_seconds = slow_seconds
+        self.bench_seconds = bench_seconds
+        self.max_bench_seconds = max_bench_seconds
+        self._scores: Dict[str, float] = {}
+        self._benched_until: Dict[str, float] = {}
+        self._bench_count: Dict[str, int] = {}
+        self._lock = td.Lock()
+
+    def record(self, item: Optional[str], success: bool, seconds: Optional[float] = None) -> None:
+        """Update the score of an item with the outcome of one request."""
+        if item is None:
+            return
+        outcome = 0.0
+        if success:
+            outcome = 0.5 if seconds is not None and seconds > self.slow_seconds else 1.0
+        with self._lock:
+            score = self.decay * self._scores.get(item, 1.0) + (1 - self.decay) * outcome
+            self._scores[item] = score
+            if score < self.bench_below and item not in self._benched_until:
+                count = self._bench_count.get(item, 0) + 1
+                self._bench_count[item] = count
+                period = min(self.max_bench_seconds, self.bench_seconds * 2 ** (count - 1))
+                self._benched_until[item] = time.monotonic() + period
+                print(f"Benched {item} for {period:.0f}s (health {score:.2f})")
+            elif success and score >= self.bench_below:
+                self._bench_count.pop(item, None)
+
+    def _release_expired(self, now: float) -> None:
+        for item, until in list(self._benched_until.items()):
+            if until <= now:
+                del self._benched_until[item]
+                # Back on probation: one more failure benches it again
+                self._scores[item] = self.bench_below + (1 - self.decay) * (1 - self.bench_below)
+
+    def choose(self, items: Sequence[str]) -> Optional[str]:
+        """Pick an item at random, weighted by score, leaving out benched ones.
+
+        If every item is benched, the one whose bench ends first is returned.
+        """
+        if not items:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self._release_expired(now)
+            healthy = [item for item in items if item not in self._benched_until]
+            if not healthy:
+                return min(items, key=lambda item: self._benched_until[item])
+            weights = [self._scores.get(item, 1.0) for item in healthy]
+        return random.choices(healthy, weights=weights)[0]
+
+    def is_benched(self, item: str) -> bool:
+        with self._lock:
+            self._release_expired(time.monotonic())
+            return item in self._benched_until
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return the score and bench state of every item seen so far."""
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "item": item,
+                    "score": score,
+                    "benched_for": max(0.0, self._benched_until[item] - now) if item in self._benched_until else 0.0,
+                }
+                for item, score in sorted(self._scores.items(), key=lambda entry: entry[1])
+            ]
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: a random delay up to base * 2 ** attempt, at most cap."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -2,13 +2,46 @@ from datetime import datetime, timedelta
 import time
 import pytz
 import re
+from functools import lru_cache
 
+# Dictionary mapping common timezone abbreviations to IANA timezone names
+TIMEZONE_MAP = {
+    'EST': 'US/Eastern',  # Eastern Standard Time
+    'EDT': 'US/Eastern',  # Eastern Daylight Time
+    'CST': 'US/Central',  # Central Standard Time
+    'CDT': 'US/Central',  # Central Daylight Time
+    'MST': 'US/Mountain', # Mountain Standard Time
+    'MDT': 'US/Mountain', # Mountain Daylight Time
+    'PST': 'US/Pacific',  # Pacific Standard Time
+    'PDT': 'US/Pacific',  # Pacific Daylight Time
+    'GMT': 'GMT',         # Greenwich Mean Time
+    'UTC': 'UTC',         # Coordinated Universal Time
+}
+
+# Pattern used to extract the timezone abbreviation
+TIMEZONE_PATTERN = re.compile(r'\d+:\d+ [AP]M (\w+)')
+
+@lru_cache(maxsize=None)
+def get_timezone(name):
+    """
+    Returns the pytz timezone for an IANA timezone name, cached after the first lookup.
+
+    Args:
+        name: The IANA timezone name, e.g. 'US/Eastern'.
+
+    Returns:
+        The pytz timezone object.
+    """
+    return pytz.timezone(name)
+
+@lru_cache(maxsize=4096)
 def parse_time_to_utc(time_str):
     """
     Parses a time string with timezone (e.g., "8:31 PM EDT, Sat March 15, 2025") and converts it to UTC.
     
     This function handles timezone abbreviations like EST, EDT, PST, etc. by mapping them
-    to their corresponding IANA timezone names.
+    to their corresponding IANA timezone names. Results are memoized, since the same
+    timestamps repeat many times within a crawl.
 
     Args:
         time_str: The time string to parse.
@@ -16,22 +49,8 @@ def parse_time_to_utc(time_str):
     Returns:
         A datetime object representing the time in UTC, or None if parsing fails.
     """
-    # Dictionary mapping common timezone abbreviations to IANA timezone names
-    timezone_map = {
-        'EST': 'US/Eastern',  # Eastern Standard Time
-        'EDT': 'US/Eastern',  # Eastern Daylight Time
-        'CST': 'US/Central',  # Central Standard Time
-        'CDT': 'US/Central',  # Central Daylight Time
-        'MST': 'US/Mountain', # Mountain Standard Time
-        'MDT': 'US/Mountain', # Mountain Daylight Time
-        'PST': 'US/Pacific',  # Pacific Standard Time
-        'PDT': 'US/Pacific',  # Pacific Daylight Time
-        'GMT': 'GMT',         # Greenwich Mean Time
-        'UTC': 'UTC',         # Coordinated Universal Time
-    }
-    
     # Extract timezone abbreviation
-    match = re.search(r'\d+:\d+ [AP]M (\w+)', time_str)
+    match = TIMEZONE_PATTERN.search(time_str)
     if not match:
         return None
     tz_abbr = match.group(1)
@@ -42,9 +61,9 @@ def parse_time_to_utc(time_str):
     dt = datetime.strptime(time_str_no_tz, "%I:%M %p %a %B %d %Y")
     
     # Apply the timezone
-    if not tz_abbr in timezone_map:
+    if not tz_abbr in TIMEZONE_MAP:
         return None
-    tz = pytz.timezone(timezone_map[tz_abbr])
+    tz = get_timezone(TIMEZONE_MAP[tz_abbr])
     # Check if we need to adjust for DST
     is_dst = 'D' in tz_abbr  # True for EDT, CDT, etc.
     dt = tz.localize(dt, is_dst=is_dst)
@@ -53,6 +72,24 @@ def parse_time_to_utc(time_str):
     utc_dt = dt.astimezone(pytz.utc)
     return utc_dt
 
+def parse_times_to_utc(time_strs):
+    """
+    Parses a list of time strings to UTC in one call.
+
+    Args:
+        time_strs: An iterable of time strings like "8:31 PM EDT, Sat March 15, 2025".
+
+    Returns:
+        A list with a UTC datetime for each string, or None where parsing fails.
+    """
+    results = []
+    for time_str in time_strs:
+        try:
+            results.append(parse_time_to_utc(time_str))
+        except ValueError:
+            results.append(None)
+    return results
+
 def convert_timezone(utc_dt, target_timezone):
     """
     Converts a datetime object to the specified timezone.
@@ -71,7 +108,7 @@ def convert_timezone(utc_dt, target_timezone):
     if utc_dt.tzinfo is None or utc_dt.tzinfo.utcoffset(utc_dt) is None:
         utc_dt = pytz.utc.localize(utc_dt)
     
-    target_tz = pytz.timezone(target_timezone)
+    target_tz = get_timezone(target_timezone)
     converted_dt = utc_dt.astimezone(target_tz)
     return converted_dt
 